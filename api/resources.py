@@ -0,0 +1,133 @@
+from django.core.exceptions import ObjectDoesNotExist
+from django.shortcuts import reverse
+
+
+class BadRequest(Exception):
+    pass
+
+
+class Resource:
+    """JSON-представление модели с выбором полей и встраиванием связей.
+
+    ``fields`` — словарь «имя поля → функция (объект, встроить ли)».
+    ``related`` и ``embedded`` — пути select_related, нужные полю в
+    коротком и во встроенном виде. Так любая комбинация ?fields= и
+    ?embed= обходится одним запросом на страницу.
+    """
+
+    def __init__(self, fields, related=None, embedded=None):
+        self.fields = fields
+        self.related = related or {}
+        self.embedded = embedded or {}
+
+    def select(self, request):
+        fields = self._names(request, "fields", self.fields)
+        embed = self._names(request, "embed", self.embedded)
+        return fields or tuple(self.fields), embed
+
+    @staticmethod
+    def _names(request, param, allowed):
+        raw = request.GET.get(param, "")
+        names = tuple(name for name in raw.split(",") if name)
+        unknown = [name for name in names if name not in allowed]
+        if unknown:
+            raise BadRequest(f"Неизвестные поля в {param}: "
+                             f"{', '.join(unknown)}")
+        return names
+
+    def paths(self, fields, embed):
+        paths = set()
+        for name in fields:
+            if name in embed:
+                paths.update(self.embedded[name])
+            else:
+                paths.update(self.related.get(name, ()))
+        return paths
+
+    def prepare(self, queryset, fields, embed):
+        paths = self.paths(fields, embed)
+        return queryset.select_related(*paths) if paths else queryset
+
+    def dump(self, obj, fields, embed=()):
+        return {name: self.fields[name](obj, name in embed)
+                for name in fields}
+
+
+def _stat(user, name):
+    try:
+        return getattr(user.stats, name)
+    except ObjectDoesNotExist:
+        return 0
+
+
+USER = Resource({
+    "id": lambda user, embed: user.id,
+    "username": lambda user, embed: user.username,
+    "name": lambda user, embed: user.get_full_name(),
+    "followers_count": lambda user, embed: _stat(user, "followers_count"),
+    "following_count": lambda user, embed: _stat(user, "following_count"),
+    "posts_count": lambda user, embed: _stat(user, "posts_count"),
+    "url": lambda user, embed: reverse("api:user", args=[user.username]),
+}, {
+    "followers_count": ("stats",),
+    "following_count": ("stats",),
+    "posts_count": ("stats",),
+})
+
+GROUP = Resource({
+    "id": lambda group, embed: group.id,
+    "slug": lambda group, embed: group.slug,
+    "title": lambda group, embed: group.title,
+    "description": lambda group, embed: group.description,
+    "url": lambda group, embed: reverse("api:group_posts",
+                                        args=[group.slug]),
+})
+
+
+def _author(obj, embed):
+    if embed:
+        return USER.dump(obj.author, tuple(USER.fields))
+    return obj.author.username
+
+
+def _group(post, embed):
+    if post.group is None:
+        return None
+    if embed:
+        return GROUP.dump(post.group, tuple(GROUP.fields))
+    return post.group.slug
+
+
+POST = Resource({
+    "id": lambda post, embed: post.id,
+    "text": lambda post, embed: post.text,
+    "html": lambda post, embed: post.text_html,
+    "author": _author,
+    "group": _group,
+    "pub_date": lambda post, embed: post.pub_date,
+    "updated_at": lambda post, embed: post.updated_at,
+    "image": lambda post, embed: post.image.url if post.image else None,
+    "comment_count": lambda post, embed: post.comment_count,
+    "url": lambda post, embed: reverse("api:post", args=[post.id]),
+}, {
+    "author": ("author",),
+    "group": ("group",),
+}, {
+    "author": ("author__stats",),
+    "group": ("group",),
+})
+
+COMMENT = Resource({
+    "id": lambda comment, embed: comment.id,
+    "post": lambda comment, embed: comment.post_id,
+    "author": _author,
+    "text": lambda comment, embed: comment.text,
+    "html": lambda comment, embed: comment.text_html,
+    "created": lambda comment, embed: comment.created,
+    "parent": lambda comment, embed: comment.parent_id,
+    "depth": lambda comment, embed: comment.depth,
+}, {
+    "author": ("author",),
+}, {
+    "author": ("author__stats",),
+})
@@ -0,0 +1,113 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ApiTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.author = User.objects.create(username="author",
+                                          first_name="Лев")
+        self.group = Group.objects.create(title="Группа", slug="group")
+        self.posts = [
+            Post.objects.create(text=f"пост {number}", author=self.author,
+                                group=self.group)
+            for number in range(3)
+        ]
+
+    def get(self, name, *args, **params):
+        return self.client.get(reverse(f"api:{name}", args=args), params)
+
+    def test_cursor_pagination(self):
+        """Проверяем обход ленты по курсору без пропусков и повторов"""
+        first = self.get("posts", limit=2).json()
+        second = self.get("posts", limit=2, cursor=first["next"]).json()
+        ids = [item["id"] for item in first["results"] + second["results"]]
+        self.assertEqual(ids, [post.id for post in reversed(self.posts)])
+        self.assertIsNone(second["next"])
+        self.assertIsNotNone(second["previous"])
+
+    def test_sparse_fields(self):
+        """Проверяем, что ?fields= ограничивает набор полей"""
+        data = self.get("posts", fields="id,text").json()
+        self.assertEqual(set(data["results"][0]), {"id", "text"})
+        response = self.get("posts", fields="id,password")
+        self.assertEqual(response.status_code, 400)
+
+    def test_embed_without_extra_queries(self):
+        """Проверяем, что встраивание автора и группы не даёт N+1"""
+        with CaptureQueriesContext(connection) as queries:
+            data = self.get("posts", embed="author,group").json()
+        self.assertEqual(len(queries), 2)
+        item = data["results"][0]
+        self.assertEqual(item["author"]["name"], "Лев")
+        self.assertEqual(item["author"]["posts_count"], 3)
+        self.assertEqual(item["group"]["slug"], "group")
+        plain = self.get("posts").json()["results"][0]
+        self.assertEqual(plain["author"], "author")
+
+    def test_etag(self):
+        """Проверяем 304 на повторный запрос и новый ETag после
+        комментария"""
+        post = self.posts[0]
+        urls = (reverse("api:posts"), reverse("api:post", args=[post.id]),
+                reverse("api:group_posts", args=["group"]),
+                reverse("api:user", args=["author"]))
+        etags = {}
+        for url in urls:
+            response = self.client.get(url)
+            etags[url] = response["ETag"]
+            repeated = self.client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            self.assertEqual(repeated.status_code, 304)
+        Comment.objects.create(text="комментарий", author=self.author,
+                               post=post)
+        for url in urls[:2]:
+            with self.subTest(url=url):
+                response = self.client.get(url,
+                                           HTTP_IF_NONE_MATCH=etags[url])
+                self.assertEqual(response.status_code, 200)
+
+    def test_embed_etag(self):
+        """Проверяем, что ETag ленты со встроенными авторами меняется
+        вместе с их счётчиками, а без встраивания — нет"""
+        reader = User.objects.create(username="reader")
+        url = reverse("api:posts")
+        embedded = self.client.get(url, {"embed": "author"})["ETag"]
+        plain = self.client.get(url)["ETag"]
+        Follow.objects.create(user=reader, author=self.author)
+        response = self.client.get(url, {"embed": "author"},
+                                   HTTP_IF_NONE_MATCH=embedded)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["results"][0]["author"]["followers_count"], 1
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=plain)
+        self.assertEqual(response.status_code, 304)
+
+    def test_comments_and_follows(self):
+        """Проверяем списки комментариев, подписчиков и ленту подписок"""
+        reader = User.objects.create(username="reader")
+        Follow.objects.create(user=reader, author=self.author)
+        Comment.objects.create(text="комментарий", author=reader,
+                               post=self.posts[0])
+        comments = self.get("post_comments", self.posts[0].id).json()
+        self.assertEqual(comments["results"][0]["author"], "reader")
+        followers = self.get("user_followers", "author").json()
+        self.assertEqual(followers["results"][0]["username"], "reader")
+        following = self.get("user_following", "reader").json()
+        self.assertEqual(following["results"][0]["username"], "author")
+        self.assertEqual(self.get("follow_posts").status_code, 401)
+        self.client.force_login(reader)
+        feed = self.get("follow_posts").json()
+        self.assertEqual(len(feed["results"]), 3)
+
+    def test_not_found_is_json(self):
+        """Проверяем, что 404 отдаётся в JSON"""
+        response = self.get("group_posts", "missing")
+        self.assertEqual(response.status_code, 404)
+        self.assertIn("error", response.json())
@@ -0,0 +1,21 @@
+from django.urls import path
+
+from . import views
+
+app_name = "api"
+
+urlpatterns = [
+    path("posts/", views.posts, name="posts"),
+    path("posts/<int:post_id>/", views.post, name="post"),
+    path("posts/<int:post_id>/comments/", views.post_comments,
+         name="post_comments"),
+    path("groups/", views.groups, name="groups"),
+    path("groups/<slug:slug>/posts/", views.group_posts, name="group_posts"),
+    path("follow/posts/", views.follow_posts, name="follow_posts"),
+    path("users/<str:username>/", views.user, name="user"),
+    path("users/<str:username>/posts/", views.user_posts, name="user_posts"),
+    path("users/<str:username>/followers/", views.user_followers,
+         name="user_followers"),
+    path("users/<str:username>/following/", views.user_following,
+         name="user_following"),
+]
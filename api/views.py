@@ -0,0 +1,140 @@
+from functools import wraps
+
+from django.conf import settings
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_safe
+
+from posts import timeline
+from posts.conditional import (api_group_condition, api_groups_condition,
+                               api_index_condition, api_profile_condition,
+                               api_users_condition, post_condition)
+from posts.models import Comment, Group, Post, User
+from posts.paginator import FEED_ORDERING, THREAD_ORDERING, CursorPaginator
+
+from .resources import COMMENT, GROUP, POST, USER, BadRequest
+
+
+def _json(data, status=200):
+    return JsonResponse(data, status=status,
+                        json_dumps_params={"ensure_ascii": False})
+
+
+def api_view(view):
+    """Только GET/HEAD; ошибки отдаются в JSON, а не HTML-страницей."""
+    @require_safe
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except BadRequest as error:
+            return _json({"error": str(error)}, status=400)
+        except Http404:
+            return _json({"error": "Не найдено"}, status=404)
+    return wrapper
+
+
+def _limit(request):
+    raw = request.GET.get("limit")
+    if raw is None:
+        return settings.POSTS_PER_PAGE
+    if not raw.isdigit() or not 0 < int(raw) <= settings.API_MAX_LIMIT:
+        raise BadRequest(f"limit должен быть от 1 до "
+                         f"{settings.API_MAX_LIMIT}")
+    return int(raw)
+
+
+def _page(resource, page, fields, embed):
+    return _json({
+        "results": [resource.dump(obj, fields, embed) for obj in page],
+        "next": page.next_cursor,
+        "previous": page.previous_cursor,
+    })
+
+
+def _listing(request, resource, queryset, ordering=FEED_ORDERING):
+    fields, embed = resource.select(request)
+    paginator = CursorPaginator(resource.prepare(queryset, fields, embed),
+                                _limit(request), ordering)
+    page = paginator.get_page(request.GET.get("cursor"))
+    return _page(resource, page, fields, embed)
+
+
+def _detail(request, resource, queryset, **lookup):
+    fields, embed = resource.select(request)
+    obj = get_object_or_404(resource.prepare(queryset, fields, embed),
+                            **lookup)
+    return _json(resource.dump(obj, fields, embed))
+
+
+@api_view
+@api_index_condition
+def posts(request):
+    return _listing(request, POST, Post.objects.all())
+
+
+@api_view
+@post_condition
+def post(request, post_id):
+    return _detail(request, POST, Post.objects.all(), pk=post_id)
+
+
+@api_view
+@post_condition
+def post_comments(request, post_id):
+    get_object_or_404(Post.objects.only("id"), pk=post_id)
+    return _listing(request, COMMENT, Comment.objects.filter(post=post_id),
+                    ordering=THREAD_ORDERING)
+
+
+@api_view
+@api_groups_condition
+def groups(request):
+    return _listing(request, GROUP, Group.objects.all(), ordering=("id",))
+
+
+@api_view
+@api_group_condition
+def group_posts(request, slug):
+    group = get_object_or_404(Group.objects.only("id"), slug=slug)
+    return _listing(request, POST, Post.objects.filter(group=group))
+
+
+@api_view
+@api_profile_condition
+def user(request, username):
+    return _detail(request, USER, User.objects.all(), username=username)
+
+
+@api_view
+@api_profile_condition
+def user_posts(request, username):
+    author = get_object_or_404(User.objects.only("id"), username=username)
+    return _listing(request, POST, Post.objects.filter(author=author))
+
+
+@api_view
+@api_users_condition
+def user_followers(request, username):
+    author = get_object_or_404(User.objects.only("id"), username=username)
+    users = User.objects.filter(follower__author=author)
+    return _listing(request, USER, users, ordering=("id",))
+
+
+@api_view
+@api_users_condition
+def user_following(request, username):
+    author = get_object_or_404(User.objects.only("id"), username=username)
+    users = User.objects.filter(following__user=author)
+    return _listing(request, USER, users, ordering=("id",))
+
+
+@api_view
+def follow_posts(request):
+    if not request.user.is_authenticated:
+        return _json({"error": "Нужна авторизация"}, status=401)
+    fields, embed = POST.select(request)
+    page = timeline.feed_page(request, request.user,
+                              POST.paths(fields, embed), _limit(request),
+                              keyset=True)
+    return _page(POST, page, fields, embed)
@@ -0,0 +1,145 @@
+import statistics
+import time
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from yatube.timing import Timings
+
+from .generator import DatasetGenerator
+from .models import Group, Post, UserStats
+from .urls import urlpatterns
+
+# Как нагружать отдельные адреса: метод, данные и чьим клиентом.
+# None — адрес пропускается: удаление поста уничтожило бы фикстуру.
+REQUESTS = {
+    "new_post": ("post", {"text": "Пост из бенчмарка"}, "reader"),
+    "add_comment": ("post", {"text": "Комментарий из бенчмарка"}, "reader"),
+    "search": ("get", {"q": "пост"}, "reader"),
+    "search_json": ("get", {"q": "пост"}, "reader"),
+    "post_edit": ("get", None, "author"),
+    "profile_export": ("get", None, "author"),
+    "post_delete": None,
+}
+DEFAULT_REQUEST = ("get", None, "reader")
+
+
+def dataset(size):
+    """Параметры generate_dataset для набора из ``size`` постов."""
+    users = max(size // 10, 10)
+    return {"users": users, "groups": 20, "posts": size,
+            "comments": size * 2, "follows": users * 5}
+
+
+def generate(size, seed=0, batch_size=5000):
+    generator = DatasetGenerator(seed, batch_size, prefix="bench")
+    params = dataset(size)
+    generator.users(params["users"])
+    generator.groups(params["groups"])
+    generator.follows(params["follows"])
+    generator.posts(params["posts"], params["comments"])
+    generator.finish()
+
+
+def fixtures():
+    """Самый популярный автор, самый активный читатель, группа и пост."""
+    author = UserStats.objects.select_related("user").order_by(
+        "-followers_count").first().user
+    reader = UserStats.objects.select_related("user").exclude(
+        user=author).order_by("-following_count").first().user
+    group = Group.objects.filter(posts__isnull=False).first()
+    post = Post.objects.filter(author=author).order_by("-pub_date").first()
+    return {
+        "users": {"author": author, "reader": reader},
+        "kwargs": {"username": author.username,
+                   "slug": group.slug if group else "",
+                   "post_id": post.id if post else 0},
+    }
+
+
+def targets(fixture):
+    for pattern in urlpatterns:
+        spec = REQUESTS.get(pattern.name, DEFAULT_REQUEST)
+        if spec is None:
+            continue
+        method, data, user = spec
+        kwargs = {name: fixture["kwargs"][name]
+                  for name in pattern.pattern.converters}
+        yield pattern.name, method, reverse(pattern.name, kwargs=kwargs), \
+            data, fixture["users"][user]
+
+
+def _percentile(values, share):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * share), len(ordered) - 1)]
+
+
+def measure(client, method, url, data, requests, cold=False):
+    latencies, queries, sql_times, statuses = [], [], [], set()
+    for _ in range(requests):
+        if cold:
+            cache.clear()
+        # Время SQL меряется через perf_counter, как в Server-Timing:
+        # CaptureQueriesContext округляет время запроса до миллисекунд.
+        timings = Timings(sampled=False)
+        with connection.execute_wrapper(timings.execute):
+            started = time.perf_counter()
+            response = getattr(client, method)(url, data)
+            if response.streaming:
+                b"".join(response.streaming_content)
+            latencies.append((time.perf_counter() - started) * 1000)
+        statuses.add(response.status_code)
+        queries.append(timings.queries)
+        sql_times.append(timings.db * 1000)
+    return {
+        "url": url,
+        "method": method.upper(),
+        "statuses": sorted(statuses),
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p90_ms": round(_percentile(latencies, 0.9), 3),
+        "p99_ms": round(_percentile(latencies, 0.99), 3),
+        "mean_ms": round(statistics.mean(latencies), 3),
+        "queries": max(queries),
+        "sql_ms": round(statistics.mean(sql_times), 3),
+    }
+
+
+def run_size(requests, cold=False):
+    """Замеряет все адреса posts/urls.py на данных, уже лежащих в базе."""
+    fixture = fixtures()
+    clients = {}
+    results = {}
+    for name, method, url, data, user in targets(fixture):
+        if user.pk not in clients:
+            clients[user.pk] = Client()
+            clients[user.pk].force_login(user)
+        results[name] = measure(clients[user.pk], method, url, data,
+                                requests, cold)
+    return results
+
+
+def compare(report, baseline, threshold):
+    """Регрессии относительно прошлого отчёта.
+
+    Регрессия — рост p90 больше чем в ``threshold`` раз или больше
+    SQL-запросов на тот же адрес при том же размере данных.
+    """
+    regressions = []
+    for size, views in report["sizes"].items():
+        for name, result in views.items():
+            before = baseline.get("sizes", {}).get(size, {}).get(name)
+            if before is None:
+                continue
+            if result["p90_ms"] > before["p90_ms"] * threshold:
+                regressions.append(
+                    f"{size}/{name}: p90 {before['p90_ms']} → "
+                    f"{result['p90_ms']} мс"
+                )
+            if result["queries"] > before["queries"]:
+                regressions.append(
+                    f"{size}/{name}: запросов {before['queries']} → "
+                    f"{result['queries']}"
+                )
+    return regressions
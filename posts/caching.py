@@ -0,0 +1,139 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import request_finished, request_started
+from django.db import DEFAULT_DB_ALIAS
+from django.dispatch import receiver
+
+from .models import FeedVersion
+
+INDEX = "index"
+# Названия и адреса существующих групп: от них зависят все карточки
+# постов и профили. Новая группа их не меняет, она меняет только
+# список групп (GROUP_LIST).
+GROUPS = "groups"
+GROUP_LIST = "group-list"
+COMMENTS = "comments"
+# Счётчики пользователей (UserStats): их показывают JSON API со
+# встроенными авторами и списки подписчиков.
+USER_STATS = "user-stats"
+# Входит в версию любого набора лент. Массовые операции (импорт,
+# генератор, перерисовка текста) сбрасывают только её, а не тысячи
+# версий авторов и групп.
+EPOCH = "epoch"
+GLOBAL = (EPOCH, INDEX, GROUPS, COMMENTS, USER_STATS)
+
+_request = threading.local()
+
+
+def group_scope(group_id):
+    return f"group:{group_id}"
+
+
+def author_scope(author_id):
+    return f"author:{author_id}"
+
+
+def _new_version():
+    return time.time_ns()
+
+
+def _load(scopes):
+    versions = dict(
+        FeedVersion.objects.using(DEFAULT_DB_ALIAS)
+        .filter(scope__in=scopes).values_list("scope", "version")
+    )
+    return {scope: versions.get(scope, 0) for scope in scopes}
+
+
+def version(*scopes):
+    """Текущая версия набора лент, подставляется в ключ {% cache %}.
+
+    Версии лежат в таблице FeedVersion: их читают и меняют все процессы,
+    а фрагменты хранятся в кэше по умолчанию. Любая запись меняет
+    версию, поэтому фрагменты можно хранить часами: старые больше не
+    запрашиваются. Версии читаются с основной базы, иначе отстающая
+    реплика вернула бы уже сброшенную версию.
+
+    Внутри запроса прочитанные версии запоминаются, а с первым чтением
+    заодно читаются общие версии (GLOBAL): условный GET, шаблон и
+    карточки одной страницы обходятся одним запросом к базе.
+    """
+    scopes = (EPOCH, *scopes)
+    known = getattr(_request, "versions", None)
+    if known is None:
+        known = _load(scopes)
+    else:
+        missing = [scope for scope in scopes if scope not in known]
+        if missing:
+            known.update(_load({*GLOBAL, *missing}))
+    return ".".join(str(known[scope]) for scope in scopes)
+
+
+def bump(*scopes):
+    """Сбрасывает версии одним UPDATE; строки новых версий вставляются."""
+    scopes = set(scopes)
+    new = _new_version()
+    updated = FeedVersion.objects.filter(scope__in=scopes).update(version=new)
+    if updated < len(scopes):
+        FeedVersion.objects.bulk_create(
+            [FeedVersion(scope=scope, version=new) for scope in scopes],
+            ignore_conflicts=True,
+        )
+    known = getattr(_request, "versions", None)
+    if known is not None:
+        for scope in scopes:
+            known.pop(scope, None)
+
+
+@receiver(request_started)
+def _start_request(**kwargs):
+    _request.versions = {}
+
+
+@receiver(request_finished)
+def _finish_request(**kwargs):
+    _request.versions = None
+
+
+def feed_context(*scopes):
+    return {
+        "feed_version": version(*scopes),
+        "feed_cache_timeout": settings.FEED_CACHE_TIMEOUT,
+    }
+
+
+def post_scopes(author_id, *group_ids):
+    scopes = [INDEX, author_scope(author_id)]
+    scopes.extend(group_scope(group_id) for group_id in set(group_ids)
+                  if group_id is not None)
+    return scopes
+
+
+CARD_KEY = "post-card:{}:{}:{}"
+
+
+def card_key(post, groups_version):
+    return CARD_KEY.format(post.pk, post.updated_at.timestamp(),
+                           groups_version)
+
+
+def render_cards(posts, render):
+    """Карточки постов из кэша; отсутствующие рендерятся через ``render``.
+
+    Ключ карточки содержит updated_at поста, поэтому правка поста или
+    смена его группы затрагивает только его собственную карточку.
+    """
+    posts = list(posts)
+    groups_version = version(GROUPS)
+    keys = [card_key(post, groups_version) for post in posts]
+    cards = cache.get_many(keys)
+    missing = {}
+    for post, key in zip(posts, keys):
+        if key not in cards:
+            cards[key] = missing[key] = render(post)
+    if missing:
+        cache.set_many(missing, settings.FEED_CACHE_TIMEOUT)
+    return [cards[key] for key in keys]
@@ -0,0 +1,119 @@
+import hashlib
+from datetime import datetime
+
+from django.db.models import Max
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+from yatube import replica
+
+from . import caching
+from .models import Group, Post, User
+
+
+def _from_version(token):
+    nanoseconds = max(int(part) for part in token.split("."))
+    return datetime.fromtimestamp(nanoseconds / 10 ** 9, tz=timezone.utc)
+
+
+def _etag(request, *parts):
+    raw = ":".join(str(part) for part in (
+        request.user.pk, request.get_full_path(), *parts
+    ))
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _index_state(request):
+    return caching.version(caching.INDEX), None
+
+
+def _group_state(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        "id", flat=True).first()
+    if group_id is None:
+        return None, None
+    return caching.version(caching.group_scope(group_id)), None
+
+
+def _profile_state(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        "id", flat=True).first()
+    if author_id is None:
+        return None, None
+    return caching.version(caching.author_scope(author_id),
+                           caching.GROUPS), None
+
+
+def _groups_state(request):
+    return caching.version(caching.GROUP_LIST), None
+
+
+def _post_state(request, post_id, username=None):
+    posts = Post.objects.filter(pk=post_id)
+    if username is not None:
+        posts = posts.filter(author__username=username)
+    state = posts.order_by().annotate(
+        last_comment=Max("comments__created")
+    ).values("author_id", "updated_at", "comment_count",
+             "last_comment").first()
+    if state is None:
+        return None, None
+    token = caching.version(caching.author_scope(state["author_id"]),
+                            caching.GROUPS)
+    moments = [state["updated_at"], _from_version(token)]
+    if state["last_comment"] is not None:
+        moments.append(state["last_comment"])
+    return (f"{token}:{state['updated_at'].timestamp()}:"
+            f"{state['comment_count']}:{state['last_comment']}",
+            max(moments))
+
+
+# Версии, от которых зависят объекты, встроенные через ?embed= JSON
+# API: встроенный автор несёт свои счётчики.
+EMBED_SCOPES = {"author": caching.USER_STATS}
+
+
+def _embedded_scopes(request):
+    embed = request.GET.get("embed", "").split(",")
+    return [scope for name, scope in EMBED_SCOPES.items() if name in embed]
+
+
+def _validators(state_func, *scopes):
+    """Собирает декоратор condition() из функции состояния.
+
+    Дополнительные ``scopes`` подмешиваются в ETag: так JSON API,
+    отдающий счётчики комментариев, учитывает и их изменения. Так же
+    подмешиваются версии объектов, запрошенных через ``?embed=``.
+    """
+    def state(request, *args, **kwargs):
+        if not hasattr(request, "_conditional_state"):
+            token, modified = state_func(request, *args, **kwargs)
+            extra = [*scopes, *_embedded_scopes(request)]
+            if token is not None and extra:
+                token = f"{token}.{caching.version(*extra)}"
+            if token is not None:
+                modified = modified or _from_version(token)
+                replica.require_fresh(modified)
+                token = _etag(request, token)
+            request._conditional_state = token, modified
+        return request._conditional_state
+
+    def etag(request, *args, **kwargs):
+        return state(request, *args, **kwargs)[0]
+
+    def last_modified(request, *args, **kwargs):
+        return state(request, *args, **kwargs)[1]
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
+
+
+index_condition = _validators(_index_state)
+group_condition = _validators(_group_state)
+profile_condition = _validators(_profile_state)
+post_condition = _validators(_post_state)
+
+api_index_condition = _validators(_index_state, caching.COMMENTS)
+api_group_condition = _validators(_group_state, caching.COMMENTS)
+api_profile_condition = _validators(_profile_state, caching.COMMENTS)
+api_groups_condition = _validators(_groups_state)
+api_users_condition = _validators(_profile_state, caching.USER_STATS)
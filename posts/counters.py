@@ -0,0 +1,93 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Post, User, UserStats
+
+
+def _shift(queryset, field, delta):
+    if delta < 0:
+        queryset = queryset.filter(**{f"{field}__gte": -delta})
+    queryset.update(**{field: F(field) + delta})
+
+
+def user_stats(user):
+    """Счётчики пользователя.
+
+    Строки UserStats может ещё не быть: её создают сигнал, импорт и
+    rebuild_counters. Тогда счётчики считаются запросами и кладутся в
+    ``user.stats`` без сохранения, чтобы страница не падала.
+    """
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        user.stats = UserStats(
+            user=user,
+            followers_count=Follow.objects.filter(author=user).count(),
+            following_count=Follow.objects.filter(user=user).count(),
+            posts_count=Post.objects.filter(author=user).count(),
+        )
+        return user.stats
+
+
+def change_user(user_id, field, delta):
+    _shift(UserStats.objects.filter(user_id=user_id), field, delta)
+
+
+def change_post(post_id, delta):
+    _shift(Post.objects.filter(pk=post_id), "comment_count", delta)
+
+
+def _count(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef("pk")})
+        .order_by().values(field).annotate(total=Count("pk"))
+        .values("total")
+    ), 0)
+
+
+def _batches(queryset, batch_size):
+    last_pk = None
+    while True:
+        batch = queryset.order_by("pk")
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        batch = list(batch[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last_pk = batch[-1].pk
+
+
+def rebuild_user_stats(batch_size):
+    users = User.objects.annotate(
+        followers=_count(Follow, "author"),
+        followings=_count(Follow, "user"),
+        posts_total=_count(Post, "author"),
+    )
+    rebuilt = 0
+    for batch in _batches(users, batch_size):
+        UserStats.objects.bulk_create(
+            [UserStats(user_id=user.pk) for user in batch],
+            ignore_conflicts=True
+        )
+        UserStats.objects.bulk_update(
+            [UserStats(user_id=user.pk, followers_count=user.followers,
+                       following_count=user.followings,
+                       posts_count=user.posts_total) for user in batch],
+            ["followers_count", "following_count", "posts_count"]
+        )
+        rebuilt += len(batch)
+    return rebuilt
+
+
+def rebuild_comment_counts(batch_size):
+    posts = Post.objects.only("pk").annotate(
+        comments_total=_count(Comment, "post")
+    )
+    rebuilt = 0
+    for batch in _batches(posts, batch_size):
+        for post in batch:
+            post.comment_count = post.comments_total
+        Post.objects.bulk_update(batch, ["comment_count"])
+        rebuilt += len(batch)
+    return rebuilt
@@ -0,0 +1,89 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Comment
+
+# CSV-файл архива содержит записи одного типа (см. import_archive
+# --type), поэтому у каждого типа свои колонки.
+FIELDS = {
+    "post": ("type", "id", "author", "group", "text", "image", "pub_date"),
+    "comment": ("type", "id", "post", "parent", "author", "text",
+                "created"),
+}
+FORMATS = {
+    "ndjson": "application/x-ndjson; charset=utf-8",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def records(author, chunk_size=1000, kinds=tuple(FIELDS)):
+    """Посты и комментарии автора в формате архива import_archive.
+
+    Строки читаются через iterator(), поэтому память не растёт с
+    размером истории. ``kinds`` ограничивает выгрузку типами записей.
+    """
+    if "post" in kinds:
+        yield from _posts(author, chunk_size)
+    if "comment" in kinds:
+        yield from _comments(author, chunk_size)
+
+
+def _posts(author, chunk_size):
+    posts = author.posts.order_by("id").values(
+        "id", "text", "image", "pub_date", "group__slug")
+    for post in posts.iterator(chunk_size=chunk_size):
+        yield {
+            "type": "post",
+            "id": post["id"],
+            "author": author.username,
+            "group": post["group__slug"],
+            "text": post["text"],
+            "image": post["image"] or None,
+            "pub_date": post["pub_date"],
+        }
+
+
+def _comments(author, chunk_size):
+    comments = Comment.objects.filter(author=author).order_by("id").values(
+        "id", "post_id", "parent_id", "text", "created")
+    for comment in comments.iterator(chunk_size=chunk_size):
+        yield {
+            "type": "comment",
+            "id": comment["id"],
+            "post": comment["post_id"],
+            "parent": comment["parent_id"],
+            "author": author.username,
+            "text": comment["text"],
+            "created": comment["created"],
+        }
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+
+
+def csv_lines(rows, kind):
+    writer = csv.DictWriter(_Echo(), fieldnames=FIELDS[kind])
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow({
+            key: value.isoformat() if hasattr(value, "isoformat") else value
+            for key, value in row.items()
+        })
+
+
+def stream(author, fmt="ndjson", chunk_size=1000, kind=None):
+    """Строки выгрузки. CSV всегда одного типа, по умолчанию посты."""
+    if fmt == "csv":
+        kind = kind or "post"
+        return csv_lines(records(author, chunk_size, (kind,)), kind)
+    return ndjson_lines(records(author, chunk_size, (kind,) if kind
+                                else tuple(FIELDS)))
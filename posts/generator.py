@@ -0,0 +1,220 @@
+import bisect
+import io
+import itertools
+import math
+import random
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.utils import timezone
+from faker import Faker
+from PIL import Image
+
+from . import caching, counters, rendering, search, threads
+from .models import Comment, Follow, Group, Post, TimelineEntry, User
+
+TEXT_POOL = 2000
+NAME_POOL = 500
+START = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _insert(model, fields, rows):
+    """Вставка кортежей через executemany.
+
+    На миллионах строк bulk_create тратит большую часть времени на
+    создание объектов и подготовку каждого значения; здесь значения
+    уже готовы для базы.
+    """
+    quote = connection.ops.quote_name
+    columns = ", ".join(quote(model._meta.get_field(name).column)
+                        for name in fields)
+    marks = ", ".join(["%s"] * len(fields))
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {quote(model._meta.db_table)} ({columns}) "
+            f"VALUES ({marks})", rows
+        )
+
+
+class DatasetGenerator:
+    """Синтетические пользователи, группы, подписки, посты и комментарии.
+
+    Всё случайное берётся из random.Random и Faker с одним зерном, так
+    что одинаковые параметры на пустой базе дают одинаковые таблицы.
+    Тексты выбираются из заранее сгенерированного пула: Faker слишком
+    медленный, чтобы звать его на каждую из миллионов строк. Ленты
+    подписчиков заполняются сразу, как это сделал бы fan_out.
+    Пользователи, группы и подписки создаются через bulk_create, а
+    посты, комментарии и записи лент — через _insert.
+    """
+
+    def __init__(self, seed=0, batch_size=5000, zipf=1.1, days=365 * 3,
+                 prefix="user"):
+        self.random = random.Random(seed)
+        faker = Faker("ru_RU")
+        faker.seed_instance(seed)
+        self.seed = seed
+        self.texts = [faker.paragraph(nb_sentences=self.random.randint(1, 6))
+                      for _ in range(TEXT_POOL)]
+        self.rendered = {text: rendering.render_post(text)
+                         for text in self.texts}
+        self.names = [(faker.first_name(), faker.last_name())
+                      for _ in range(NAME_POOL)]
+        self.words = [faker.word() for _ in range(NAME_POOL)]
+        self.batch_size = batch_size
+        self.zipf = zipf
+        self.span = timedelta(days=days).total_seconds()
+        self.prefix = prefix
+        self.user_ids = []
+        self.group_ids = []
+        self.followers = {}
+        self.images = []
+
+    def users(self, count):
+        password = make_password(None)
+        for chunk in _chunks(range(count), self.batch_size):
+            usernames = [f"{self.prefix}{number}" for number in chunk]
+            with transaction.atomic():
+                User.objects.bulk_create([
+                    User(username=username, password=password,
+                         first_name=first_name, last_name=last_name)
+                    for username, (first_name, last_name) in zip(
+                        usernames,
+                        (self.random.choice(self.names) for _ in chunk)
+                    )
+                ])
+            self.user_ids.extend(User.objects.filter(
+                username__in=usernames).order_by("id").values_list(
+                "id", flat=True))
+
+    def groups(self, count):
+        Group.objects.bulk_create([
+            Group(title=f"{self.random.choice(self.words).title()} {number}",
+                  slug=f"{self.prefix}-group-{number}",
+                  description=self.random.choice(self.texts))
+            for number in range(count)
+        ])
+        self.group_ids = list(Group.objects.filter(
+            slug__startswith=f"{self.prefix}-group-").order_by(
+            "id").values_list("id", flat=True))
+
+    def follows(self, count):
+        """Подписки со степенным распределением числа подписчиков.
+
+        Вес автора с рангом r равен 1 / r**zipf, ранги перемешаны
+        зерном. Несколько авторов собирают большую часть подписок, у
+        большинства их единицы — как в живой соцсети.
+        """
+        ranked = list(self.user_ids)
+        self.random.shuffle(ranked)
+        weights = list(itertools.accumulate(
+            1 / rank ** self.zipf for rank in range(1, len(ranked) + 1)
+        ))
+        pairs = set()
+        attempts = 0
+        while len(pairs) < count and attempts < count * 3:
+            attempts += 1
+            user_id = self.random.choice(self.user_ids)
+            position = bisect.bisect(weights,
+                                     self.random.random() * weights[-1])
+            author_id = ranked[min(position, len(ranked) - 1)]
+            if user_id != author_id:
+                pairs.add((user_id, author_id))
+        for chunk in _chunks(sorted(pairs), self.batch_size):
+            Follow.objects.bulk_create(
+                [Follow(user_id=user_id, author_id=author_id)
+                 for user_id, author_id in chunk],
+                ignore_conflicts=True
+            )
+        for user_id, author_id in pairs:
+            self.followers.setdefault(author_id, []).append(user_id)
+
+    def image_pool(self, count):
+        for number in range(count):
+            color = tuple(self.random.randrange(256) for _ in range(3))
+            buffer = io.BytesIO()
+            Image.new("RGB", (960, 640), color).save(buffer, "PNG")
+            self.images.append(default_storage.save(
+                f"posts/synthetic-{self.seed}-{number}.png",
+                ContentFile(buffer.getvalue())
+            ))
+
+    def posts(self, count, comments=0, image_ratio=0.0):
+        """Посты по возрастанию даты, комментарии и записи лент.
+
+        Число комментариев к посту распределено геометрически со
+        средним comments / count, так что в сумме их около ``comments``.
+        """
+        mean = comments / count if count else 0
+        rate = math.log1p(1 / mean) if mean else None
+        first_id = (Post.objects.order_by("-id").values_list(
+            "id", flat=True).first() or 0) + 1
+        for chunk in _chunks(range(count), self.batch_size):
+            with transaction.atomic():
+                self._posts_batch(chunk, count, first_id, rate, image_ratio)
+
+    def _posts_batch(self, chunk, count, first_id, rate, image_ratio):
+        moment = connection.ops.adapt_datetimefield_value
+        limit = settings.TIMELINE_FANOUT_LIMIT
+        posts, comments, entries = [], [], []
+        for number in chunk:
+            post_id = first_id + number
+            pub_date = START + timedelta(
+                seconds=self.span * (number + self.random.random()) / count
+            )
+            author_id = self.random.choice(self.user_ids)
+            group_id = None
+            if self.group_ids and self.random.random() < 0.5:
+                group_id = self.random.choice(self.group_ids)
+            image = None
+            if self.images and self.random.random() < image_ratio:
+                image = self.random.choice(self.images)
+            total = int(self.random.expovariate(rate)) if rate else 0
+            text = self.random.choice(self.texts)
+            posts.append((post_id, text, *self.rendered[text], author_id,
+                          group_id, image, moment(pub_date),
+                          moment(pub_date), total, "", rendering.VERSION))
+            # Комментарии идут в порядке id, поэтому время — по
+            # возрастанию, как у настоящих веток.
+            delays = sorted(self.random.randint(1, 60 * 24)
+                            for _ in range(total))
+            for delay in delays:
+                text = self.random.choice(self.texts)
+                comments.append((
+                    text, self.rendered[text][0],
+                    self.random.choice(self.user_ids), post_id,
+                    moment(pub_date + timedelta(minutes=delay)), "", 0,
+                    rendering.VERSION,
+                ))
+            followers = self.followers.get(author_id, ())
+            if len(followers) <= limit:
+                entries.extend((user_id, post_id, author_id, moment(pub_date))
+                               for user_id in followers)
+        _insert(Post, ("id", "text", "text_html", "excerpt_html", "author",
+                       "group", "image", "pub_date", "updated_at",
+                       "comment_count", "thumbnails", "render_version"),
+                posts)
+        _insert(Comment, ("text", "text_html", "author", "post", "created",
+                          "path", "depth", "render_version"), comments)
+        _insert(TimelineEntry, ("user", "post", "author", "pub_date"),
+                entries)
+
+    def finish(self):
+        threads.fill_root_paths()
+        counters.rebuild_user_stats(self.batch_size)
+        if search.available():
+            search.rebuild(self.batch_size)
+        caching.bump(caching.EPOCH)
@@ -0,0 +1,266 @@
+import csv
+import json
+import os
+from contextlib import contextmanager
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import caching, counters, search, tasks, threads
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+KINDS = ("group", "post", "comment", "follow")
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def read_records(path, fmt, kind=None):
+    """Построчно читает архив, отдавая пары (номер строки, запись)."""
+    with open(path, newline="", encoding="utf-8") as source:
+        if fmt == "csv":
+            for number, row in enumerate(csv.DictReader(source), 1):
+                yield number, dict(row, type=kind)
+            return
+        for number, line in enumerate(source, 1):
+            if line.strip():
+                yield number, json.loads(line)
+
+
+@contextmanager
+def keep_archive_dates():
+    fields = [Post._meta.get_field("pub_date"),
+              Post._meta.get_field("updated_at"),
+              Comment._meta.get_field("created")]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _last_id(model):
+    return model.objects.order_by("-id").values_list(
+        "id", flat=True).first() or 0
+
+
+class ArchiveImporter:
+    """Потоковый импорт групп, постов, комментариев и подписок.
+
+    Записи копятся в буферах по типам и сбрасываются через bulk_create
+    каждые ``batch_size`` строк в одной транзакции, после чего номер
+    строки пишется в файл контрольной точки. Имена пользователей и slug
+    групп переводятся в id через словари в памяти.
+
+    Контрольная точка хранит и состояние всего импорта: последние id
+    подписок и постов до его начала и счётчики. Поэтому finish()
+    после возобновления догоняет и то, что успел записать упавший
+    запуск.
+    """
+
+    def __init__(self, batch_size=1000, checkpoint=None):
+        self.batch_size = batch_size
+        self.checkpoint = checkpoint
+        self.users = {}
+        self.groups = {}
+        self.buffers = {kind: [] for kind in KINDS}
+        self.buffered = 0
+        self.imported = dict.fromkeys(KINDS, 0)
+        self.follow_start = self.post_start = 0
+
+    def resume_from(self):
+        """Восстанавливает состояние импорта; возвращает номер строки."""
+        state = {}
+        if self.checkpoint and os.path.exists(self.checkpoint):
+            with open(self.checkpoint) as source:
+                state = json.load(source)
+        self.follow_start = state.get("follow_start", _last_id(Follow))
+        self.post_start = state.get("post_start", _last_id(Post))
+        self.imported.update(state.get("imported", {}))
+        return state.get("line", 0)
+
+    def save_checkpoint(self, line):
+        if not self.checkpoint:
+            return
+        temporary = f"{self.checkpoint}.tmp"
+        with open(temporary, "w") as target:
+            json.dump({
+                "line": line,
+                "follow_start": self.follow_start,
+                "post_start": self.post_start,
+                "imported": self.imported,
+            }, target)
+        os.replace(temporary, self.checkpoint)
+
+    def run(self, records):
+        start = self.resume_from()
+        self.save_checkpoint(start)
+        line = start
+        with keep_archive_dates():
+            for line, record in records:
+                if line <= start:
+                    continue
+                kind = record.get("type")
+                if kind not in self.buffers:
+                    raise ArchiveError(
+                        f"Строка {line}: неизвестный тип {kind}"
+                    )
+                self.buffers[kind].append(record)
+                self.buffered += 1
+                if self.buffered >= self.batch_size:
+                    self.flush(line)
+            self.flush(line)
+        self.finish()
+        return self.imported
+
+    def flush(self, line):
+        if self.buffered:
+            with transaction.atomic():
+                self.write_groups(self.buffers["group"])
+                self.write_posts(self.buffers["post"])
+                self.write_comments(self.buffers["comment"])
+                self.write_follows(self.buffers["follow"])
+            for kind in KINDS:
+                self.imported[kind] += len(self.buffers[kind])
+                self.buffers[kind] = []
+            self.buffered = 0
+        self.save_checkpoint(line)
+
+    def resolve_users(self, usernames):
+        missing = {name for name in usernames if name not in self.users}
+        if not missing:
+            return
+        self.users.update(User.objects.filter(
+            username__in=missing).values_list("username", "id"))
+        unknown = missing - set(self.users)
+        if unknown:
+            password = make_password(None)
+            User.objects.bulk_create(
+                [User(username=name, password=password) for name in unknown],
+                batch_size=self.batch_size
+            )
+            created = dict(User.objects.filter(
+                username__in=unknown).values_list("username", "id"))
+            # bulk_create не шлёт post_save, а профиль и страница поста
+            # ждут строку счётчиков ещё до finish().
+            UserStats.objects.bulk_create(
+                [UserStats(user_id=user_id) for user_id in created.values()],
+                batch_size=self.batch_size, ignore_conflicts=True
+            )
+            self.users.update(created)
+
+    def resolve_groups(self, slugs):
+        missing = {slug for slug in slugs if slug and slug not in self.groups}
+        if missing:
+            self.groups.update(Group.objects.filter(
+                slug__in=missing).values_list("slug", "id"))
+        unknown = missing - set(self.groups)
+        if unknown:
+            raise ArchiveError(f"Неизвестные группы: {', '.join(unknown)}")
+
+    @staticmethod
+    def moment(value):
+        return parse_datetime(value) if value else timezone.now()
+
+    def write_groups(self, records):
+        Group.objects.bulk_create([
+            Group(slug=record["slug"], title=record["title"],
+                  description=record.get("description", ""))
+            for record in records
+        ], ignore_conflicts=True)
+
+    def write_posts(self, records):
+        self.resolve_users(record["author"] for record in records)
+        self.resolve_groups(record.get("group") for record in records)
+        posts = []
+        for record in records:
+            pub_date = self.moment(record.get("pub_date"))
+            post = Post(
+                id=record.get("id") or None, text=record["text"],
+                author_id=self.users[record["author"]],
+                group_id=self.groups.get(record.get("group")),
+                image=record.get("image") or None,
+                pub_date=pub_date, updated_at=pub_date,
+            )
+            post.render()
+            posts.append(post)
+        Post.objects.bulk_create(posts)
+
+    @staticmethod
+    def number(value):
+        return int(value) if value not in (None, "") else None
+
+    def write_comments(self, records):
+        """Комментарии с id и parent сразу получают путь в ветке.
+
+        Родитель ищется среди уже записанных комментариев и в самой
+        пачке (выгрузка идёт по возрастанию id). Ответ на отсутствующий
+        комментарий или без собственного id становится комментарием
+        верхнего уровня; такой путь потом заполняет fill_root_paths().
+        """
+        self.resolve_users(record["author"] for record in records)
+        parent_ids = {self.number(record.get("parent")) for record in records}
+        places = {
+            comment_id: (path, depth)
+            for comment_id, path, depth in Comment.objects.filter(
+                id__in=parent_ids - {None}
+            ).values_list("id", "path", "depth")
+        }
+        comments = []
+        for record in records:
+            comment = Comment(id=self.number(record.get("id")),
+                              post_id=int(record["post"]), text=record["text"],
+                              author_id=self.users[record["author"]],
+                              created=self.moment(record.get("created")))
+            parent = places.get(self.number(record.get("parent")))
+            if comment.id is not None:
+                prefix = ""
+                if parent is not None:
+                    comment.depth, prefix, comment.parent_id = Comment.place(
+                        *parent)
+                comment.path = prefix + (
+                    f"{comment.id:0{Comment.PATH_SEGMENT}d}")
+                places[comment.id] = (comment.path, comment.depth)
+            comment.render()
+            comments.append(comment)
+        Comment.objects.bulk_create(comments)
+
+    def write_follows(self, records):
+        self.resolve_users(record["user"] for record in records)
+        self.resolve_users(record["author"] for record in records)
+        Follow.objects.bulk_create([
+            Follow(user_id=self.users[record["user"]],
+                   author_id=self.users[record["author"]])
+            for record in records
+            if record["user"] != record["author"]
+        ], ignore_conflicts=True)
+
+    def finish(self):
+        """bulk_create не шлёт сигналы и не вызывает save(), поэтому
+        производные данные (пути комментариев, счётчики, поиск, ленты,
+        версии кэша) догоняются здесь — для всего импорта, включая
+        прерванные запуски."""
+        threads.fill_root_paths()
+        counters.rebuild_user_stats(self.batch_size)
+        counters.rebuild_comment_counts(self.batch_size)
+        if search.available() and self.imported["post"]:
+            search.rebuild(self.batch_size)
+        follows = Follow.objects.filter(
+            Q(id__gt=self.follow_start)
+            | Q(author__posts__id__gt=self.post_start)
+        ).distinct().values_list("user_id", "author_id")
+        chunk = []
+        for pair in follows.iterator():
+            chunk.append(pair)
+            if len(chunk) >= self.batch_size:
+                tasks.backfill_timeline.delay_many(chunk)
+                chunk = []
+        tasks.backfill_timeline.delay_many(chunk)
+        caching.bump(caching.EPOCH)
@@ -0,0 +1,131 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from yatube.sqlite_backend.base import configure
+
+SCHEMA = """
+CREATE TABLE post (
+    id INTEGER PRIMARY KEY, author_id INTEGER, text TEXT, pub_date REAL
+);
+CREATE INDEX post_author_feed ON post (author_id, pub_date DESC, id DESC);
+CREATE TABLE stats (author_id INTEGER PRIMARY KEY, posts_count INTEGER);
+"""
+READ = ("SELECT id, text FROM post WHERE author_id = ? "
+        "ORDER BY pub_date DESC, id DESC LIMIT 10")
+AUTHORS = 100
+
+
+def _connect(path, profile):
+    connection = sqlite3.connect(path, isolation_level=None)
+    configure(connection, profile["pragmas"])
+    return connection
+
+
+def _read(connection, number):
+    connection.execute(READ, (number % AUTHORS,)).fetchall()
+
+
+def _write(connection, number, begin):
+    # Как new_post: чтение и запись в одной транзакции.
+    author_id = number % AUTHORS
+    connection.execute(begin)
+    try:
+        connection.execute("SELECT posts_count FROM stats "
+                           "WHERE author_id = ?", (author_id,)).fetchone()
+        connection.execute("INSERT INTO post (author_id, text, pub_date) "
+                           "VALUES (?, ?, ?)",
+                           (author_id, "текст", time.time()))
+        connection.execute("UPDATE stats SET posts_count = posts_count + 1 "
+                           "WHERE author_id = ?", (author_id,))
+        connection.execute("COMMIT")
+    except sqlite3.OperationalError:
+        connection.execute("ROLLBACK")
+        raise
+
+
+def _worker(path, profile, kind, deadline, results):
+    connection = _connect(path, profile)
+    done = errors = 0
+    begin = "BEGIN IMMEDIATE" if profile["immediate"] else "BEGIN"
+    while time.monotonic() < deadline:
+        try:
+            if kind == "read":
+                _read(connection, done)
+            else:
+                _write(connection, done, begin)
+            done += 1
+        except sqlite3.OperationalError:
+            errors += 1
+    connection.close()
+    results.append((kind, done, errors))
+
+
+def run(path, profile, readers, writers, seconds, rows):
+    """Прогоняет читателей и писателей параллельно на файле ``path``.
+
+    Возвращает число операций в секунду и ошибок для чтения и записи.
+    """
+    connection = _connect(path, profile)
+    connection.executescript(SCHEMA)
+    connection.executemany("INSERT INTO stats VALUES (?, 0)",
+                           ((author,) for author in range(AUTHORS)))
+    connection.execute("BEGIN")
+    connection.executemany(
+        "INSERT INTO post (author_id, text, pub_date) VALUES (?, ?, ?)",
+        ((number % AUTHORS, "текст", number) for number in range(rows))
+    )
+    connection.execute("COMMIT")
+    connection.close()
+    results = []
+    deadline = time.monotonic() + seconds
+    threads = [
+        threading.Thread(target=_worker,
+                         args=(path, profile, kind, deadline, results))
+        for kind in ["read"] * readers + ["write"] * writers
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    report = {}
+    for kind in ("read", "write"):
+        done = sum(row[1] for row in results if row[0] == kind)
+        errors = sum(row[2] for row in results if row[0] == kind)
+        report[kind] = (done / seconds, errors)
+    return report
+
+
+class Command(BaseCommand):
+    help = ("Сравнивает пропускную способность SQLite при параллельных "
+            "чтениях и записях без настроек и с профилем production")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--readers", type=int, default=4)
+        parser.add_argument("--writers", type=int, default=2)
+        parser.add_argument("--seconds", type=float, default=5)
+        parser.add_argument("--rows", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        profiles = {
+            "default": {"pragmas": {}, "immediate": False},
+            "production": {"pragmas": settings.SQLITE_PRAGMAS,
+                           "immediate": True},
+        }
+        self.stdout.write(f"{'профиль':<12}{'чтений/с':>12}{'ошибок':>8}"
+                          f"{'записей/с':>12}{'ошибок':>8}")
+        with tempfile.TemporaryDirectory() as directory:
+            for name, profile in profiles.items():
+                report = run(os.path.join(directory, f"{name}.sqlite3"),
+                             profile, options["readers"], options["writers"],
+                             options["seconds"], options["rows"])
+                (reads, read_errors), (writes, write_errors) = (
+                    report["read"], report["write"]
+                )
+                self.stdout.write(f"{name:<12}{reads:>12.0f}{read_errors:>8}"
+                                  f"{writes:>12.0f}{write_errors:>8}")
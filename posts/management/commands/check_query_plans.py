@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from posts import query_plans
+
+
+class Command(BaseCommand):
+    help = ("Проверяет планы запросов лент: без полных просмотров таблиц "
+            "и сортировок во временном B-дереве")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("EXPLAIN QUERY PLAN есть только в SQLite")
+        failed = []
+        for name, queryset in query_plans.feed_queries().items():
+            plan = query_plans.explain(queryset)
+            found = query_plans.problems(plan)
+            style = self.style.ERROR if found else self.style.SUCCESS
+            self.stdout.write(style(name))
+            for line in plan:
+                self.stdout.write(f"    {line}")
+            if found:
+                failed.append(f"{name}: {'; '.join(found)}")
+        if failed:
+            raise CommandError("Запросы без подходящего индекса:\n"
+                               + "\n".join(failed))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import exporter
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = "Потоково выгружает посты и комментарии автора в NDJSON или CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument("username")
+        parser.add_argument("--format", choices=exporter.FORMATS,
+                            default="ndjson")
+        parser.add_argument("--type", choices=exporter.FIELDS,
+                            help="Выгрузить только записи этого типа; "
+                                 "CSV без --type содержит посты")
+        parser.add_argument("--output", help="Файл для выгрузки")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        author = User.objects.filter(username=options["username"]).first()
+        if author is None:
+            raise CommandError(f"Пользователь {options['username']} не найден")
+        lines = exporter.stream(author, options["format"],
+                                options["chunk_size"], options["type"])
+        if not options["output"]:
+            for line in lines:
+                self.stdout.write(line, ending="")
+            return
+        with open(options["output"], "w", newline="",
+                  encoding="utf-8") as target:
+            target.writelines(lines)
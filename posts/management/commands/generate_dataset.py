@@ -0,0 +1,57 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.generator import DatasetGenerator
+from posts.models import Group, User
+
+
+class Command(BaseCommand):
+    help = ("Создаёт синтетический набор данных для нагрузочных тестов: "
+            "пользователей, группы, подписки, посты и комментарии")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--groups", type=int, default=20)
+        parser.add_argument("--posts", type=int, default=10000)
+        parser.add_argument("--comments", type=int, default=20000)
+        parser.add_argument("--follows", type=int, default=10000)
+        parser.add_argument("--images", type=int, default=0,
+                            help="Размер пула картинок")
+        parser.add_argument("--image-ratio", type=float, default=0.2,
+                            help="Доля постов с картинкой")
+        parser.add_argument("--zipf", type=float, default=1.1,
+                            help="Показатель степенного закона подписок")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--prefix", default="user",
+                            help="Префикс имён пользователей и групп")
+
+    def handle(self, *args, **options):
+        if options["users"] < 1:
+            raise CommandError("Нужен хотя бы один пользователь")
+        prefix = options["prefix"]
+        if (User.objects.filter(username__startswith=prefix).exists()
+                or Group.objects.filter(
+                    slug__startswith=f"{prefix}-group-").exists()):
+            raise CommandError(f"Данные с префиксом {prefix} уже есть, "
+                               f"укажите другой --prefix")
+        generator = DatasetGenerator(options["seed"], options["batch_size"],
+                                     options["zipf"],
+                                     prefix=prefix)
+        steps = (
+            ("пользователи", generator.users, (options["users"],)),
+            ("группы", generator.groups, (options["groups"],)),
+            ("подписки", generator.follows, (options["follows"],)),
+            ("картинки", generator.image_pool, (options["images"],)),
+            ("посты", generator.posts, (options["posts"],
+                                        options["comments"],
+                                        options["image_ratio"])),
+            ("счётчики и индексы", generator.finish, ()),
+        )
+        for name, step, arguments in steps:
+            started = time.monotonic()
+            step(*arguments)
+            self.stdout.write(
+                f"{name}: {time.monotonic() - started:.1f} с"
+            )
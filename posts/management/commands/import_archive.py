@@ -0,0 +1,40 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.importer import KINDS, ArchiveImporter, ArchiveError, read_records
+
+
+class Command(BaseCommand):
+    help = ("Потоково импортирует группы, посты, комментарии и подписки "
+            "из JSONL или CSV")
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=("jsonl", "csv"))
+        parser.add_argument("--type", choices=KINDS,
+                            help="Тип записей для CSV-файла")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--checkpoint",
+                            help="Файл контрольной точки для продолжения")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or (
+            "csv" if path.endswith(".csv") else "jsonl"
+        )
+        if fmt == "csv" and not options["type"]:
+            raise CommandError("Для CSV укажите --type")
+        if not os.path.exists(path):
+            raise CommandError(f"Файл {path} не найден")
+        importer = ArchiveImporter(options["batch_size"],
+                                   options["checkpoint"])
+        try:
+            imported = importer.run(read_records(path, fmt, options["type"]))
+        except (ArchiveError, KeyError, ValueError) as error:
+            raise CommandError(f"Импорт остановлен: {error}")
+        self.stdout.write(self.style.SUCCESS(
+            "Импортировано: " + ", ".join(
+                f"{kind} {count}" for kind, count in imported.items()
+            )
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = ("Пересчитывает счётчики подписчиков, подписок, записей "
+            "и комментариев")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        users = counters.rebuild_user_stats(batch_size)
+        posts = counters.rebuild_comment_counts(batch_size)
+        self.stdout.write(self.style.SUCCESS(
+            f"Пересчитано: пользователей {users}, постов {posts}"
+        ))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from posts import caching, rendering
+from posts.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = "Перерисовывает HTML постов и комментариев текущей версией разметки"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--force", action="store_true",
+                            help="перерисовать и строки текущей версии")
+
+    def handle(self, *args, **options):
+        batch_size, force = options["batch_size"], options["force"]
+        posts = rendering.rebuild(Post, batch_size, force)
+        comments = rendering.rebuild(Comment, batch_size, force)
+        if posts or comments:
+            caching.bump(caching.EPOCH)
+        self.stdout.write(self.style.SUCCESS(
+            f"Перерисовано: постов {posts}, комментариев {comments}"
+        ))
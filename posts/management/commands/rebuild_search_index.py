@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = "Переиндексирует тексты постов для полнотекстового поиска"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if not search.available():
+            raise CommandError(
+                "Полнотекстовый поиск работает только на SQLite"
+            )
+        indexed = search.rebuild(options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Проиндексировано постов: {indexed}"
+        ))
@@ -0,0 +1,73 @@
+import json
+from datetime import datetime
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from posts import benchmarks
+
+
+class Command(BaseCommand):
+    help = ("Замеряет все адреса posts/urls.py на сгенерированных данных "
+            "нескольких размеров и пишет JSON-отчёт")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="1000,10000",
+                            help="Размеры наборов в постах через запятую")
+        parser.add_argument("--requests", type=int, default=20,
+                            help="Запросов на каждый адрес")
+        parser.add_argument("--cold", action="store_true",
+                            help="Очищать кэш перед каждым запросом")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", default="benchmark.json")
+        parser.add_argument("--baseline",
+                            help="Отчёт, с которым сравнивать результаты")
+        parser.add_argument("--threshold", type=float, default=1.25,
+                            help="Допустимый рост p90, во сколько раз")
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options["sizes"].split(",")]
+        report = {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "requests": options["requests"],
+            "cold": options["cold"],
+            "sizes": {},
+        }
+        # Бенчмарк работает в отдельной тестовой базе, чтобы не трогать
+        # рабочие данные.
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            for size in sizes:
+                call_command("flush", interactive=False, verbosity=0)
+                benchmarks.generate(size, options["seed"])
+                results = benchmarks.run_size(options["requests"],
+                                              options["cold"])
+                report["sizes"][str(size)] = results
+                self.print_size(size, results)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        with open(options["output"], "w") as target:
+            json.dump(report, target, ensure_ascii=False, indent=2)
+        self.stdout.write(f"Отчёт записан в {options['output']}")
+        if options["baseline"]:
+            with open(options["baseline"]) as source:
+                baseline = json.load(source)
+            regressions = benchmarks.compare(report, baseline,
+                                             options["threshold"])
+            if regressions:
+                raise CommandError("Регрессии относительно базового "
+                                   "отчёта:\n" + "\n".join(regressions))
+            self.stdout.write(self.style.SUCCESS("Регрессий нет"))
+
+    def print_size(self, size, results):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"{size} постов"))
+        self.stdout.write(f"{'адрес':<18}{'p50':>9}{'p90':>9}{'p99':>9}"
+                          f"{'SQL':>6}{'SQL мс':>9}")
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<18}{result['p50_ms']:>9.2f}{result['p90_ms']:>9.2f}"
+                f"{result['p99_ms']:>9.2f}{result['queries']:>6}"
+                f"{result['sql_ms']:>9.2f}"
+            )
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from yatube.replica import REPLICA, copy_database
+
+
+class Command(BaseCommand):
+    help = "Периодически копирует основную базу SQLite в файл реплики"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, default=1.0)
+        parser.add_argument("--once", action="store_true")
+
+    def handle(self, *args, **options):
+        if REPLICA not in connections.databases:
+            raise CommandError("Реплика не настроена (YATUBE_REPLICA)")
+        source = connections.databases[DEFAULT_DB_ALIAS]["NAME"]
+        target = connections.databases[REPLICA]["NAME"]
+        while True:
+            copy_database(source, target)
+            if options["once"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,58 @@
+# Generated by Django 2.2.6 on 2026-10-18 03:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count
+
+
+def fill_counters(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    UserStats = apps.get_model("posts", "UserStats")
+    Follow = apps.get_model("posts", "Follow")
+    Post = apps.get_model("posts", "Post")
+    Comment = apps.get_model("posts", "Comment")
+    followers = dict(Follow.objects.values_list("author").annotate(
+        total=Count("id")).order_by())
+    followings = dict(Follow.objects.values_list("user").annotate(
+        total=Count("id")).order_by())
+    posts = dict(Post.objects.values_list("author").annotate(
+        total=Count("id")).order_by())
+    UserStats.objects.bulk_create(
+        [UserStats(user_id=user_id,
+                   followers_count=followers.get(user_id, 0),
+                   following_count=followings.get(user_id, 0),
+                   posts_count=posts.get(user_id, 0))
+         for user_id in User.objects.values_list("id", flat=True)],
+        batch_size=1000
+    )
+    comments = Comment.objects.values_list("post").annotate(
+        total=Count("id")).order_by()
+    for post_id, total in comments:
+        Post.objects.filter(pk=post_id).update(comment_count=total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0007_auto_20261018_0304'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('followers_count', models.PositiveIntegerField(default=0, verbose_name='Подписчиков')),
+                ('following_count', models.PositiveIntegerField(default=0, verbose_name='Подписок')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Записей')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество комментариев'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
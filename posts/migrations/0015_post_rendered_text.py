@@ -0,0 +1,52 @@
+# Generated by Django 2.2.6 on 2026-10-18 03:48
+
+from django.conf import settings
+from django.db import migrations, models
+from django.template.defaultfilters import linebreaksbr
+from django.utils.text import Truncator
+
+
+# Копия posts.rendering на момент миграции: живой модуль с тех пор
+# менялся и будет меняться дальше.
+def render(text):
+    return linebreaksbr(text, autoescape=True)
+
+
+def render_post(text):
+    excerpt = Truncator(text).chars(settings.POST_EXCERPT_LENGTH)
+    return render(text), render(excerpt)
+
+
+def render_posts(apps, schema_editor):
+    Post = apps.get_model("posts", "Post")
+    posts = Post.objects.only("id", "text").order_by("id")
+    last_id = 0
+    while True:
+        batch = list(posts.filter(id__gt=last_id)[:1000])
+        if not batch:
+            return
+        for post in batch:
+            post.text_html, post.excerpt_html = render_post(post.text)
+        Post.objects.bulk_update(batch, ["text_html", "excerpt_html"])
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_comment_threads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt_html',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Превью для лент'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Текст в HTML'),
+        ),
+        migrations.RunPython(render_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 2.2.6 on 2026-10-18 03:50
+
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils.html import escape
+from django.utils.http import urlencode
+from django.utils.text import Truncator, normalize_newlines
+
+# Копия posts.rendering версии 2 на момент миграции. Адреса профиля и
+# поиска записаны строками: имена адресов тоже могут измениться.
+VERSION = 2
+
+MARKUP = re.compile(
+    r"(?P<url>https?://[^\s<>\"'…]*[^\s<>\"'….,:;!?)])"
+    r"|(?<![\w@])@(?P<mention>[\w.+-]*\w)"
+    r"|(?<!\w)#(?P<tag>\w+)"
+)
+
+
+def _link(href, label, rel=None):
+    rel = f' rel="{rel}"' if rel else ""
+    return f'<a href="{escape(href)}"{rel}>{escape(label)}</a>'
+
+
+def _markup(match):
+    if match["url"]:
+        return _link(match["url"], match["url"], "nofollow noopener")
+    if match["mention"]:
+        name = match["mention"]
+        return _link(f"/{quote(name, safe='!$&()*+,;=~:@')}/", f"@{name}")
+    tag = match["tag"]
+    return _link(f"/search/?{urlencode({'q': tag})}", f"#{tag}")
+
+
+def render(text):
+    text = normalize_newlines(text)
+    parts = []
+    position = 0
+    for match in MARKUP.finditer(text):
+        parts.append(escape(text[position:match.start()]))
+        parts.append(_markup(match))
+        position = match.end()
+    parts.append(escape(text[position:]))
+    return "".join(parts).replace("\n", "<br>")
+
+
+def render_text(apps, schema_editor):
+    for name, fields in (("Post", ["text_html", "excerpt_html"]),
+                         ("Comment", ["text_html"])):
+        model = apps.get_model("posts", name)
+        rows = model.objects.only("id", "text").order_by("id")
+        last_id = 0
+        while True:
+            batch = list(rows.filter(id__gt=last_id)[:1000])
+            if not batch:
+                break
+            for row in batch:
+                row.text_html = render(row.text)
+                if "excerpt_html" in fields:
+                    row.excerpt_html = render(Truncator(row.text).chars(
+                        settings.POST_EXCERPT_LENGTH))
+                row.render_version = VERSION
+            model.objects.bulk_update(batch, fields + ["render_version"])
+            last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_post_rendered_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='render_version',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Версия разметки'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='text_html',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Текст в HTML'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='render_version',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Версия разметки'),
+        ),
+        migrations.RunPython(render_text, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,12 @@
+import json
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import models
 from django.shortcuts import reverse
 
+from . import rendering
+
 User = get_user_model()
 
 
@@ -24,6 +29,7 @@ class Post(models.Model):
         help_text="Здесь можно написать всё, что угодно"
     )
     pub_date = models.DateTimeField("date published", auto_now_add=True)
+    updated_at = models.DateTimeField("date updated", auto_now=True)
     author = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="posts"
     )
@@ -36,12 +42,66 @@ class Post(models.Model):
         upload_to="posts/", blank=True, null=True,
         verbose_name="Картинка поста"
     )
+    comment_count = models.PositiveIntegerField(
+        verbose_name="Количество комментариев", default=0, editable=False
+    )
+    thumbnails = models.TextField(
+        verbose_name="Миниатюры картинки", blank=True, default="",
+        editable=False
+    )
+    text_html = models.TextField(
+        verbose_name="Текст в HTML", blank=True, default="", editable=False
+    )
+    excerpt_html = models.TextField(
+        verbose_name="Превью для лент", blank=True, default="",
+        editable=False
+    )
+    render_version = models.PositiveSmallIntegerField(
+        verbose_name="Версия разметки", default=0, editable=False
+    )
+
+    # Поля, которые не нужны карточкам лент: полный текст читает только
+    # страница поста.
+    CARD_DEFERRED = ("text", "text_html")
 
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        self.render()
+        super().save(*args, **kwargs)
+
+    def render(self):
+        rendering.render_fields(self)
+
+    @property
+    def thumbnail_urls(self):
+        """Готовые адреса миниатюр; пока их нет — адрес оригинала."""
+        if not self.image:
+            return {}
+        manifest = json.loads(self.thumbnails or "{}")
+        if manifest.pop("source", None) != self.image.name:
+            manifest = {}
+        return {variant: manifest.get(variant, self.image.url)
+                for variant in settings.THUMBNAIL_VARIANTS}
+
+    @property
+    def thumbnails_stale(self):
+        if not self.image:
+            return bool(self.thumbnails)
+        return json.loads(self.thumbnails or "{}").get(
+            "source") != self.image.name
+
     class Meta:
         ordering = ["-pub_date"]
+        indexes = [
+            models.Index(fields=["-pub_date", "-id"],
+                         name="post_feed_idx"),
+            models.Index(fields=["author", "-pub_date", "-id"],
+                         name="post_author_feed_idx"),
+            models.Index(fields=["group", "-pub_date", "-id"],
+                         name="post_group_feed_idx"),
+        ]
 
 
 class Comment(models.Model):
@@ -59,6 +119,63 @@ class Comment(models.Model):
         verbose_name="Пост", help_text="Комментарий можно оставить "
                                        "к любому посту"
     )
+    parent = models.ForeignKey(
+        "self", on_delete=models.CASCADE, related_name="replies",
+        blank=True, null=True, verbose_name="Ответ на"
+    )
+    path = models.CharField(max_length=255, default="", editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+    text_html = models.TextField(
+        verbose_name="Текст в HTML", blank=True, default="", editable=False
+    )
+    render_version = models.PositiveSmallIntegerField(
+        verbose_name="Версия разметки", default=0, editable=False
+    )
+
+    # Путь — id всех предков и самого комментария по PATH_SEGMENT цифр.
+    # Сортировка по пути даёт ветку в порядке показа: ответы идут сразу
+    # за родителем, соседние ответы — по времени создания.
+    PATH_SEGMENT = 10
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["post", "path"],
+                         name="comment_thread_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.render()
+        prefix = None if self.path else self._path_prefix()
+        super().save(*args, **kwargs)
+        if prefix is not None:
+            self.path = prefix + f"{self.pk:0{self.PATH_SEGMENT}d}"
+            Comment.objects.filter(pk=self.pk).update(path=self.path)
+
+    def render(self):
+        rendering.render_fields(self)
+
+    @classmethod
+    def place(cls, parent_path, parent_depth):
+        """Глубина ответа, префикс его пути и id фактического родителя.
+
+        Ответы глубже COMMENT_MAX_DEPTH становятся ответами на предка
+        на предельной глубине, чтобы ветка не уходила вправо.
+        """
+        depth = min(parent_depth + 1, settings.COMMENT_MAX_DEPTH)
+        prefix = parent_path[:cls.PATH_SEGMENT * depth]
+        return depth, prefix, int(prefix[-cls.PATH_SEGMENT:])
+
+    def _path_prefix(self):
+        """Путь родителя, к которому дописывается id комментария."""
+        if self.parent_id is None:
+            self.depth = 0
+            return ""
+        parent = self.parent
+        self.depth, prefix, parent_id = self.place(parent.path,
+                                                   parent.depth)
+        if parent_id != parent.pk:
+            self.parent = Comment.objects.get(pk=parent_id)
+        return prefix
 
 
 class Follow(models.Model):
@@ -74,3 +191,55 @@ class Follow(models.Model):
             models.UniqueConstraint(fields=["user", "author"],
                                     name="unique follow")
         ]
+        indexes = [
+            models.Index(fields=["author", "user"],
+                         name="follow_author_user_idx")
+        ]
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="timeline"
+    )
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name="timeline_entries"
+    )
+    author = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="+"
+    )
+    pub_date = models.DateTimeField("date published")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "post"],
+                                    name="unique timeline entry")
+        ]
+        indexes = [
+            models.Index(fields=["user", "author"],
+                         name="timeline_user_author_idx"),
+            models.Index(fields=["user", "-pub_date", "-id"],
+                         name="timeline_user_feed_idx"),
+        ]
+
+
+class UserStats(models.Model):
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, related_name="stats",
+        primary_key=True
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name="Подписчиков", default=0
+    )
+    following_count = models.PositiveIntegerField(
+        verbose_name="Подписок", default=0
+    )
+    posts_count = models.PositiveIntegerField(
+        verbose_name="Записей", default=0
+    )
+
+
+class FeedVersion(models.Model):
+    """Версия набора лент для ключей кэша фрагментов (posts.caching)."""
+
+    scope = models.CharField(max_length=100, primary_key=True)
+    version = models.BigIntegerField()
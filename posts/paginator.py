@@ -0,0 +1,309 @@
+import base64
+import binascii
+import heapq
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.paginator import Page, Paginator
+from django.db.models import DateTimeField, Q
+
+FEED_ORDERING = ("-pub_date", "-id")
+THREAD_ORDERING = ("path",)
+
+
+def encode_token(direction, values):
+    raw = json.dumps([direction] + list(values)).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_token(token, size):
+    padded = token + "=" * (-len(token) % 4)
+    try:
+        direction, *values = json.loads(
+            base64.urlsafe_b64decode(padded.encode())
+        )
+    except (binascii.Error, ValueError, TypeError):
+        return None
+    if direction not in ("next", "prev") or len(values) != size:
+        return None
+    return direction, values
+
+
+class CursorPage(Page):
+    """Страница ленты, адресуемая курсором, а не номером.
+
+    Курсор хранит значения ключей сортировки крайней записи, поэтому
+    следующая страница выбирается по индексу без OFFSET и без COUNT(*).
+    """
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, cursor, has_next,
+                 has_previous):
+        super().__init__(object_list, None, paginator)
+        self.cursor = cursor
+        self._has_next = has_next
+        self._has_previous = has_previous
+        # Курсоры считаются сразу: object_list страницы можно потом
+        # подменить (например, записями ленты вместо строк TimelineEntry).
+        self.next_cursor = None
+        self.previous_cursor = None
+        if object_list and has_next:
+            self.next_cursor = paginator.encode_cursor("next",
+                                                       object_list[-1])
+        if object_list and has_previous:
+            self.previous_cursor = paginator.encode_cursor("prev",
+                                                           object_list[0])
+
+    def __repr__(self):
+        return f"<Page {self.cursor or 'first'}>"
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+
+class CursorPaginator(Paginator):
+    """Keyset-пагинация по уникальному набору полей сортировки.
+
+    По умолчанию лента сортируется по (pub_date, id), так что страница
+    5000 стоит столько же, сколько первая.
+    """
+
+    def __init__(self, object_list, per_page, ordering=FEED_ORDERING):
+        super().__init__(object_list.order_by(*ordering), per_page)
+        self.ordering = ordering
+        self.model = object_list.model
+
+    def _field(self, name):
+        return self.model._meta.get_field(name.lstrip("-"))
+
+    def encode_cursor(self, direction, obj):
+        return encode_token(direction, [
+            self._field(name).value_to_string(obj) for name in self.ordering
+        ])
+
+    def decode_cursor(self, cursor):
+        decoded = decode_token(cursor, len(self.ordering))
+        if decoded is None:
+            return None
+        direction, values = decoded
+        try:
+            values = [self._field(name).to_python(value)
+                      for name, value in zip(self.ordering, values)]
+        except (ValueError, TypeError, ValidationError):
+            return None
+        if any(value is None for value in values):
+            return None
+        return direction, values
+
+    def _keyset_filter(self, values, backwards):
+        first = self.ordering[0]
+        descending = first.startswith("-") != backwards
+        # Нестрогая граница по первому ключу дублирует условие ниже, но
+        # даёт SQLite начать поиск по индексу с позиции курсора, а не
+        # просматривать индекс с начала.
+        lookup = "__lte" if descending else "__gte"
+        bound = Q(**{first.lstrip("-") + lookup: values[0]})
+        condition = Q()
+        for position, name in enumerate(self.ordering):
+            descending = name.startswith("-") != backwards
+            lookup = "__lt" if descending else "__gt"
+            step = Q(**{name.lstrip("-") + lookup: values[position]})
+            for previous, value in zip(self.ordering[:position], values):
+                step &= Q(**{previous.lstrip("-"): value})
+            condition |= step
+        if len(self.ordering) > 1:
+            return bound & condition
+        return condition
+
+    def query(self, values=None, backwards=False):
+        """Запрос одной страницы: per_page + 1 строк после курсора."""
+        queryset = self.object_list
+        if values is not None:
+            queryset = queryset.filter(
+                self._keyset_filter(values, backwards)
+            )
+        if backwards:
+            queryset = queryset.reverse()
+        return queryset[:self.per_page + 1]
+
+    def page(self, cursor):
+        decoded = self.decode_cursor(cursor) if cursor else None
+        if decoded is None:
+            cursor = None
+            direction, values = "next", None
+        else:
+            direction, values = decoded
+        backwards = direction == "prev"
+        rows = list(self.query(values, backwards))
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+            return CursorPage(rows, self, cursor, True, has_more)
+        return CursorPage(rows, self, cursor, has_more, values is not None)
+
+    def get_page(self, cursor):
+        return self.page(cursor)
+
+
+class MergedFeed:
+    """Лента, слитая из нескольких запросов, упорядоченных по FEED_ORDERING.
+
+    ``sources`` — пары (ранг, queryset). Каждый источник читается по
+    своему индексу с LIMIT, а слияние идёт в Python по ключу
+    (pub_date, ранг, id): ранг различает источники с совпадающим
+    pub_date и id. Ключ сохраняется в ``feed_key`` записей, из него
+    строится курсор. Известные заранее (например, из счётчиков) размеры
+    источников передаются в ``counts`` по рангу, чтобы не делать для них
+    COUNT(*).
+    """
+
+    def __init__(self, sources, counts=None):
+        self.sources = sources
+        self.counts = counts or {}
+
+    def count(self):
+        return sum(self.counts[rank] if rank in self.counts
+                   else queryset.count()
+                   for rank, queryset in self.sources)
+
+    @staticmethod
+    def _after(rank, values, backwards):
+        pub_date, cursor_rank, cursor_id = values
+        if rank == cursor_rank:
+            if backwards:
+                return (Q(pub_date__gte=pub_date)
+                        & (Q(pub_date__gt=pub_date)
+                           | Q(pub_date=pub_date, id__gt=cursor_id)))
+            return (Q(pub_date__lte=pub_date)
+                    & (Q(pub_date__lt=pub_date)
+                       | Q(pub_date=pub_date, id__lt=cursor_id)))
+        # При равном pub_date источник с большим рангом идёт раньше.
+        if backwards:
+            lookup = "gte" if rank > cursor_rank else "gt"
+        else:
+            lookup = "lte" if rank < cursor_rank else "lt"
+        return Q(**{f"pub_date__{lookup}": pub_date})
+
+    def queries(self, limit, values=None, backwards=False):
+        """Запросы источников: до ``limit`` строк после курсора."""
+        queries = []
+        for rank, queryset in self.sources:
+            queryset = queryset.order_by(*FEED_ORDERING)
+            if values is not None:
+                queryset = queryset.filter(
+                    self._after(rank, values, backwards)
+                )
+            if backwards:
+                queryset = queryset.reverse()
+            queries.append((rank, queryset[:limit]))
+        return queries
+
+    def rows(self, limit, values=None, backwards=False):
+        streams = []
+        for rank, queryset in self.queries(limit, values, backwards):
+            rows = list(queryset)
+            for row in rows:
+                row.feed_key = (row.pub_date, rank, row.id)
+            streams.append(rows)
+        merged = heapq.merge(*streams, key=lambda row: row.feed_key,
+                             reverse=not backwards)
+        return [row for row, _ in zip(merged, range(limit))]
+
+    def __getitem__(self, index):
+        # Обычный Paginator берёт срез [bottom:top]: из каждого
+        # источника хватает первых top строк.
+        return self.rows(index.stop)[index]
+
+
+class MergedCursorPaginator(Paginator):
+    """Курсорная пагинация MergedFeed; курсор — ключ слияния."""
+
+    def encode_cursor(self, direction, obj):
+        pub_date, rank, row_id = obj.feed_key
+        return encode_token(direction, [pub_date.isoformat(), rank, row_id])
+
+    def decode_cursor(self, cursor):
+        decoded = decode_token(cursor, 3)
+        if decoded is None:
+            return None
+        direction, (pub_date, rank, row_id) = decoded
+        try:
+            pub_date = DateTimeField().to_python(pub_date)
+        except ValidationError:
+            return None
+        if (pub_date is None or not isinstance(rank, int)
+                or not isinstance(row_id, int)):
+            return None
+        return direction, [pub_date, rank, row_id]
+
+    def get_page(self, cursor):
+        decoded = self.decode_cursor(cursor) if cursor else None
+        if decoded is None:
+            cursor = None
+            direction, values = "next", None
+        else:
+            direction, values = decoded
+        backwards = direction == "prev"
+        rows = self.object_list.rows(self.per_page + 1, values, backwards)
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+            return CursorPage(rows, self, cursor, True, has_more)
+        return CursorPage(rows, self, cursor, has_more, values is not None)
+
+
+def _shallow_number(number, shallow):
+    """Номер страницы слитой ленты, не дальше ``shallow``.
+
+    Страница N слияния читает N страниц из каждого источника, поэтому
+    глубже листать можно только по курсору.
+    """
+    try:
+        return min(int(number), shallow)
+    except (TypeError, ValueError):
+        return number
+
+
+def paginate(request, object_list, per_page=None, ordering=FEED_ORDERING,
+             count=None, keyset=False):
+    """Возвращает страницу ленты для запроса.
+
+    Запросы с ``?cursor=`` обслуживает CursorPaginator. Старые ссылки
+    ``?page=N`` продолжают работать через обычный Paginator, но ссылка
+    «Следующая» с последней из первых PAGINATOR_SHALLOW_PAGES страниц
+    уже переводит на курсор. Если размер ленты уже известен из
+    счётчиков, его можно передать в ``count`` вместо COUNT(*).
+    MergedFeed листается так же, но всегда в FEED_ORDERING, а номер
+    страницы у неё не больше PAGINATOR_SHALLOW_PAGES.
+    ``keyset=True`` включает курсорный режим и без параметра в запросе.
+    """
+    per_page = per_page or settings.POSTS_PER_PAGE
+    cursor = request.GET.get("cursor")
+    if isinstance(object_list, MergedFeed):
+        cursors = MergedCursorPaginator(object_list, per_page)
+        ordered = object_list
+    else:
+        cursors = CursorPaginator(object_list, per_page, ordering)
+        ordered = object_list.order_by(*ordering)
+    if keyset or cursor is not None:
+        return cursors.get_page(cursor)
+    shallow = settings.PAGINATOR_SHALLOW_PAGES
+    number = request.GET.get("page")
+    if isinstance(object_list, MergedFeed):
+        number = _shallow_number(number, shallow)
+    paginator = Paginator(ordered, per_page)
+    if count is not None:
+        paginator.count = count
+    page = paginator.get_page(number)
+    page.page_links = range(1, min(paginator.num_pages, shallow) + 1)
+    page.next_cursor = None
+    if page.has_next() and page.number >= shallow:
+        page.next_cursor = cursors.encode_cursor("next",
+                                                 page[len(page) - 1])
+    return page
@@ -0,0 +1,82 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from . import threads, timeline
+from .models import Comment, Follow, Group, Post, TimelineEntry, User
+from .paginator import FEED_ORDERING, THREAD_ORDERING, CursorPaginator
+
+FULL_SCAN = re.compile(r"^SCAN (TABLE )?\S+( AS \S+)?$")
+TEMP_SORT = "USE TEMP B-TREE"
+
+
+def explain(queryset):
+    """Строки EXPLAIN QUERY PLAN для запроса (только SQLite)."""
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def problems(plan):
+    """Полные просмотры таблиц и сортировки во временном B-дереве."""
+    return [line for line in plan
+            if FULL_SCAN.match(line) or TEMP_SORT in line]
+
+
+def _pages(name, queryset, ordering=FEED_ORDERING, values=None):
+    paginator = CursorPaginator(queryset, settings.POSTS_PER_PAGE, ordering)
+    values = values or [timezone.now(), 0]
+    return {
+        name: paginator.query(),
+        f"{name} (cursor)": paginator.query(values),
+        f"{name} (cursor, back)": paginator.query(values, backwards=True),
+    }
+
+
+def _merged_pages(name, feed):
+    limit = settings.POSTS_PER_PAGE + 1
+    values = [timezone.now(), 0, 0]
+    queries = {}
+    for label, args in (("", ()), (" (cursor)", (values,)),
+                        (" (cursor, back)", (values, True))):
+        # Первый источник — записи ленты, остальные — знаменитости.
+        for index, (rank, queryset) in enumerate(feed.queries(limit, *args)):
+            source = "celebrity" if index else "timeline"
+            queries[f"{name} {source}{label}"] = queryset
+    return queries
+
+
+def feed_queries():
+    """Запросы лент в том виде, в каком их выполняют представления.
+
+    Идентификаторы берутся из базы, если там есть данные; на пустой базе
+    план строится для несуществующих id, что для планировщика SQLite
+    ничего не меняет.
+    """
+    user_id = User.objects.values_list("id", flat=True).first() or 0
+    group_id = Group.objects.values_list("id", flat=True).first() or 0
+    post_id = Post.objects.values_list("id", flat=True).first() or 0
+    root = Comment.objects.order_by().first() or Comment(path="0", depth=0)
+    # Слияние с записями знаменитостей проверяется всегда: если в базе
+    # нет подписок на знаменитость, план строится для первого автора.
+    # На пустой базе автор получает id 1: ранг его источника — id
+    # автора, и ранг 0 совпал бы с рангом записей ленты.
+    follow = Follow.objects.filter(
+        author__stats__followers_count__gt=settings.TIMELINE_FANOUT_LIMIT
+    ).first() or Follow(user_id=user_id, author_id=user_id or 1)
+    return {
+        **_pages("index", Post.objects.all()),
+        **_pages("group_posts", Post.objects.filter(group_id=group_id)),
+        **_pages("profile", Post.objects.filter(author_id=user_id)),
+        **_pages("follow_index", TimelineEntry.objects.filter(
+            user_id=user_id).select_related("post")),
+        **_merged_pages("follow_index merged", timeline.feed(
+            follow.user_id, [(follow.author_id, 0)], ("author", "group"),
+            Post.CARD_DEFERRED)),
+        **_pages("post_view comments", threads.thread(post_id),
+                 THREAD_ORDERING, [root.path]),
+        "comment subtree": threads.thread(root.post_id or post_id, root, 2),
+    }
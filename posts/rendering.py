@@ -0,0 +1,93 @@
+import re
+
+from django.conf import settings
+from django.urls import reverse
+from django.utils.html import escape
+from django.utils.http import urlencode
+from django.utils.text import Truncator, normalize_newlines
+
+# Версия правил разметки. Строки, отрисованные другой версией,
+# перерисовывает manage.py rebuild_rendered_text.
+VERSION = 2
+
+MARKUP = re.compile(
+    r"(?P<url>https?://[^\s<>\"'…]*[^\s<>\"'….,:;!?)])"
+    r"|(?<![\w@])@(?P<mention>[\w.+-]*\w)"
+    r"|(?<!\w)#(?P<tag>\w+)"
+)
+
+
+def _link(href, label, rel=None):
+    rel = f' rel="{rel}"' if rel else ""
+    return f'<a href="{escape(href)}"{rel}>{escape(label)}</a>'
+
+
+def _markup(match):
+    if match["url"]:
+        return _link(match["url"], match["url"], "nofollow noopener")
+    if match["mention"]:
+        name = match["mention"]
+        return _link(reverse("profile", args=[name]), f"@{name}")
+    tag = match["tag"]
+    return _link(f"{reverse('search')}?{urlencode({'q': tag})}", f"#{tag}")
+
+
+def render(text):
+    """HTML текста: ссылки, @упоминания, #хэштеги и переносы строк.
+
+    Всё, кроме собственных ссылок, экранируется, поэтому результат
+    безопасно выводить без обработки в шаблоне.
+    """
+    text = normalize_newlines(text)
+    parts = []
+    position = 0
+    for match in MARKUP.finditer(text):
+        parts.append(escape(text[position:match.start()]))
+        parts.append(_markup(match))
+        position = match.end()
+    parts.append(escape(text[position:]))
+    return "".join(parts).replace("\n", "<br>")
+
+
+def excerpt(text):
+    return Truncator(text).chars(settings.POST_EXCERPT_LENGTH)
+
+
+def render_post(text):
+    """Полный текст и превью для карточек лент, оба в HTML."""
+    return render(text), render(excerpt(text))
+
+
+def render_fields(obj):
+    """Заполняет HTML-поля поста или комментария текущей версией."""
+    obj.text_html = render(obj.text)
+    # Проверяем класс: у экземпляра из only() обращение к отложенному
+    # полю стоило бы отдельного запроса.
+    if hasattr(type(obj), "excerpt_html"):
+        obj.excerpt_html = render(excerpt(obj.text))
+    obj.render_version = VERSION
+
+
+def rebuild(model, batch_size, force=False):
+    """Перерисовывает строки ``model``, отрисованные другой версией.
+
+    Миграции этот модуль не импортируют: в них лежат замороженные копии
+    рендера своей версии.
+    """
+    fields = ["text_html", "render_version"]
+    if hasattr(model, "excerpt_html"):
+        fields.append("excerpt_html")
+    rows = model.objects.only("id", "text").order_by("id")
+    if not force:
+        rows = rows.exclude(render_version=VERSION)
+    rendered = 0
+    last_id = 0
+    while True:
+        batch = list(rows.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            return rendered
+        for row in batch:
+            render_fields(row)
+        model.objects.bulk_update(batch, fields)
+        rendered += len(batch)
+        last_id = batch[-1].id
@@ -0,0 +1,118 @@
+import re
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import Post
+from .paginator import CursorPage, decode_token, encode_token
+
+TABLE = "posts_post_fts"
+WORD = re.compile(r"\w+")
+ENDINGS = sorted((
+    "иями", "ями", "ами", "иях", "ях", "ах", "ого", "его", "ому", "ему",
+    "ыми", "ими", "ией", "ий", "ый", "ой", "ая", "яя", "ое", "ее", "ые",
+    "ие", "ую", "юю", "ов", "ев", "ом", "ем", "ей", "ам", "ям", "ию", "ия",
+    "ье", "ья", "а", "я", "о", "е", "ы", "и", "у", "ю", "ь", "й",
+), key=len, reverse=True)
+MIN_STEM = 3
+
+
+def available():
+    return connection.vendor == "sqlite"
+
+
+def stem(word):
+    """Грубое отсечение русских окончаний; остаток ищется как префикс."""
+    for ending in ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM:
+            return word[:-len(ending)]
+    return word
+
+
+def match_expression(query):
+    terms = [stem(word) for word in WORD.findall(query.lower())]
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def index_post(post):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE} WHERE rowid = %s", [post.pk])
+        cursor.execute(f"INSERT INTO {TABLE} (rowid, text) VALUES (%s, %s)",
+                       [post.pk, post.text])
+
+
+def unindex_post(post_id):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE} WHERE rowid = %s", [post_id])
+
+
+def rebuild(chunk_size):
+    indexed = 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE}")
+        rows = Post.objects.order_by("pk").values_list("pk", "text")
+        last_pk = 0
+        while True:
+            chunk = list(rows.filter(pk__gt=last_pk)[:chunk_size])
+            if not chunk:
+                return indexed
+            # Без транзакции SQLite фиксирует каждую строку отдельно.
+            with transaction.atomic():
+                cursor.executemany(
+                    f"INSERT INTO {TABLE} (rowid, text) VALUES (%s, %s)",
+                    chunk
+                )
+            indexed += len(chunk)
+            last_pk = chunk[-1][0]
+
+
+class SearchPaginator:
+    """Курсорная пагинация результатов по (rank, id) из FTS5."""
+
+    def __init__(self, query, per_page=None):
+        self.expression = match_expression(query)
+        self.per_page = per_page or settings.POSTS_PER_PAGE
+
+    def encode_cursor(self, direction, post):
+        return encode_token(direction, [post.search_rank, post.pk])
+
+    def _rows(self, values, backwards):
+        sql = f"SELECT rowid, rank FROM {TABLE} WHERE {TABLE} MATCH %s"
+        params = [self.expression]
+        if values is not None:
+            sign = "<" if backwards else ">"
+            sql += (f" AND (rank {sign} %s OR (rank = %s"
+                    f" AND rowid {sign} %s))")
+            params += [values[0], values[0], values[1]]
+        order = "DESC" if backwards else "ASC"
+        sql += f" ORDER BY rank {order}, rowid {order} LIMIT %s"
+        params.append(self.per_page + 1)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def get_page(self, cursor):
+        decoded = decode_token(cursor, 2) if cursor else None
+        if decoded is None:
+            cursor = None
+            direction, values = "next", None
+        else:
+            direction, values = decoded
+        backwards = direction == "prev"
+        rows = self._rows(values, backwards) if self.expression else []
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+        posts = Post.objects.select_related("author", "group").in_bulk(
+            [post_id for post_id, _ in rows]
+        )
+        results = []
+        for post_id, rank in rows:
+            post = posts.get(post_id)
+            if post is not None:
+                post.search_rank = rank
+                results.append(post)
+        if backwards:
+            return CursorPage(results, self, cursor, True, has_more)
+        return CursorPage(results, self, cursor, has_more, values is not None)
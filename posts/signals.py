@@ -0,0 +1,121 @@
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from . import caching, counters, search, tasks, timeline
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+@receiver(post_save, sender=User)
+def create_user_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_group(sender, instance, raw=False, **kwargs):
+    instance._saved_group_id = None
+    if instance.pk is not None and not raw:
+        instance._saved_group_id = Post.objects.filter(
+            pk=instance.pk
+        ).values_list("group_id", flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    scopes = caching.post_scopes(
+        instance.author_id, instance.group_id,
+        getattr(instance, "_saved_group_id", None)
+    )
+    if created:
+        scopes.append(caching.USER_STATS)
+    caching.bump(*scopes)
+    if search.available():
+        search.index_post(instance)
+    if instance.thumbnails_stale:
+        tasks.generate_thumbnails.delay(instance.pk)
+    if created:
+        counters.change_user(instance.author_id, "posts_count", 1)
+        if timeline.defer_fan_out(instance.author_id):
+            tasks.fan_out_post.delay(instance.pk)
+        else:
+            timeline.fan_out(instance)
+
+
+# Посты, удаляемые сейчас. Их комментарии удаляются каскадом раньше
+# самого поста, и уменьшать счётчик поста на каждый из них незачем.
+_deleting_posts = set()
+
+
+@receiver(pre_delete, sender=Post)
+def post_deleting(sender, instance, **kwargs):
+    _deleting_posts.add(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    _deleting_posts.discard(instance.pk)
+    scopes = caching.post_scopes(instance.author_id, instance.group_id)
+    scopes.append(caching.USER_STATS)
+    if instance.comment_count:
+        scopes.append(caching.COMMENTS)
+    caching.bump(*scopes)
+    counters.change_user(instance.author_id, "posts_count", -1)
+    if search.available():
+        search.unindex_post(instance.pk)
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        caching.bump(caching.GROUP_LIST)
+    else:
+        caching.bump(caching.INDEX, caching.GROUPS, caching.GROUP_LIST,
+                     caching.group_scope(instance.pk))
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    caching.bump(caching.INDEX, caching.GROUPS, caching.GROUP_LIST,
+                 caching.group_scope(instance.pk))
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change_post(instance.post_id, 1)
+        caching.bump(caching.COMMENTS)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    if instance.post_id in _deleting_posts:
+        return
+    counters.change_post(instance.post_id, -1)
+    caching.bump(caching.COMMENTS)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        caching.bump(caching.author_scope(instance.author_id),
+                     caching.author_scope(instance.user_id),
+                     caching.USER_STATS)
+        counters.change_user(instance.author_id, "followers_count", 1)
+        counters.change_user(instance.user_id, "following_count", 1)
+        timeline.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    caching.bump(caching.author_scope(instance.author_id),
+                 caching.author_scope(instance.user_id), caching.USER_STATS)
+    counters.change_user(instance.author_id, "followers_count", -1)
+    counters.change_user(instance.user_id, "following_count", -1)
+    timeline.prune(instance.user_id, instance.author_id)
+    if timeline.left_celebrities(instance.author_id):
+        tasks.restore_timelines.delay(instance.author_id)
@@ -0,0 +1,28 @@
+from tasks.queue import task
+
+from . import thumbnails, timeline
+from .models import Post
+
+
+@task(priority=10)
+def generate_thumbnails(post_id):
+    thumbnails.generate(post_id)
+
+
+@task(priority=5)
+def fan_out_post(post_id):
+    post = Post.objects.filter(pk=post_id).only(
+        "id", "author_id", "pub_date"
+    ).first()
+    if post is not None:
+        timeline.fan_out(post)
+
+
+@task(priority=1)
+def backfill_timeline(user_id, author_id):
+    timeline.backfill(user_id, author_id)
+
+
+@task(priority=1)
+def restore_timelines(author_id):
+    timeline.restore(author_id)
@@ -0,0 +1,28 @@
+from django import template
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from posts import caching
+
+from .holes import DEFERRED, fill_markers
+
+register = template.Library()
+
+
+def render_card(post):
+    return render_to_string("includes/post_card.html", {
+        "post": post,
+        "html": post.excerpt_html,
+        "username": post.author.username,
+        "date": post.pub_date,
+        DEFERRED: True,
+    })
+
+
+@register.simple_tag(takes_context=True)
+def post_cards(context, posts):
+    """Собирает ленту из закэшированных карточек постов."""
+    output = "".join(caching.render_cards(posts, render_card))
+    if not context.get(DEFERRED):
+        output = fill_markers(context, output)
+    return mark_safe(output)
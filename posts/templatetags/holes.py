@@ -0,0 +1,103 @@
+import re
+from urllib.parse import quote, unquote
+
+from django import template
+from django.template.loader import render_to_string
+
+from posts.models import Follow
+
+register = template.Library()
+
+DEFERRED = "holes_deferred"
+MARKER = re.compile(r"<!--hole:([\w-]+)((?::[^:>]*)*)-->")
+
+
+def post_controls(context, author_id, username, post_id):
+    user = context.get("user")
+    if user is None or str(user.pk) != author_id:
+        return ""
+    return render_to_string("includes/post_controls.html",
+                            {"username": username, "post_id": post_id})
+
+
+def follow_button(context, author_id, username):
+    user = context.get("user")
+    following = False
+    if user is not None and user.is_authenticated:
+        if str(user.pk) == author_id:
+            return render_to_string("includes/follow_button.html",
+                                    {"username": username, "own": True})
+        author = context.get("author")
+        if author is not None and str(author.pk) == author_id:
+            following = context.get("following")
+        if following is None:
+            following = Follow.objects.filter(
+                user=user, author_id=author_id
+            ).exists()
+    return render_to_string("includes/follow_button.html",
+                            {"username": username, "following": following})
+
+
+FILLERS = {
+    "post_controls": post_controls,
+    "follow_button": follow_button,
+}
+
+
+def fill(context, name, args):
+    return FILLERS[name](context, *args)
+
+
+def fill_markers(context, output):
+    def replace(match):
+        args = [unquote(arg) for arg in match.group(2).split(":")[1:]]
+        return fill(context, match.group(1), args)
+
+    return MARKER.sub(replace, output)
+
+
+class HoleNode(template.Node):
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def render(self, context):
+        args = [str(arg.resolve(context)) for arg in self.args]
+        if context.get(DEFERRED):
+            encoded = "".join(":" + quote(arg, safe="") for arg in args)
+            return f"<!--hole:{self.name}{encoded}-->"
+        return fill(context, self.name, args)
+
+
+class FillHolesNode(template.Node):
+    def __init__(self, nodelist):
+        self.nodelist = nodelist
+
+    def render(self, context):
+        with context.push(**{DEFERRED: True}):
+            output = self.nodelist.render(context)
+        return fill_markers(context, output)
+
+
+@register.tag
+def hole(parser, token):
+    """Место в общем закэшированном фрагменте под разметку конкретного
+    зрителя: ``{% hole "post_controls" post.author_id ... %}``."""
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' tag requires a hole name"
+        )
+    name = bits[1].strip("\"'")
+    if name not in FILLERS:
+        raise template.TemplateSyntaxError(f"Unknown hole '{name}'")
+    return HoleNode(name, [parser.compile_filter(bit) for bit in bits[2:]])
+
+
+@register.tag
+def fillholes(parser, token):
+    """Внутри блока ``{% hole %}`` оставляет метки, которые заполняются
+    уже после {% cache %}, так что кэш остаётся общим для всех."""
+    nodelist = parser.parse(("endfillholes",))
+    parser.delete_first_token()
+    return FillHolesNode(nodelist)
@@ -0,0 +1,36 @@
+from django.test import TestCase
+
+from posts import benchmarks
+from posts.urls import urlpatterns
+
+
+class BenchmarkTest(TestCase):
+    def test_every_view_measured(self):
+        """Проверяем, что замеряются все адреса, кроме пропущенных"""
+        benchmarks.generate(200, seed=3, batch_size=50)
+        results = benchmarks.run_size(requests=2)
+        expected = {pattern.name for pattern in urlpatterns
+                    if benchmarks.REQUESTS.get(pattern.name, True)}
+        self.assertEqual(set(results), expected)
+        for name, result in results.items():
+            with self.subTest(name=name):
+                self.assertLess(max(result["statuses"]), 400)
+                self.assertGreater(result["queries"], 0)
+                self.assertGreater(result["sql_ms"], 0)
+                self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+
+    def test_compare_reports_regressions(self):
+        """Проверяем сравнение с базовым отчётом"""
+        baseline = {"sizes": {"1000": {
+            "index": {"p90_ms": 10.0, "queries": 5},
+            "profile": {"p90_ms": 10.0, "queries": 5},
+        }}}
+        report = {"sizes": {"1000": {
+            "index": {"p90_ms": 11.0, "queries": 5},
+            "profile": {"p90_ms": 20.0, "queries": 6},
+            "post": {"p90_ms": 50.0, "queries": 9},
+        }}}
+        regressions = benchmarks.compare(report, baseline, 1.25)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(all(line.startswith("1000/profile")
+                            for line in regressions))
@@ -0,0 +1,80 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import caching
+from posts.models import Group, Post, User
+
+
+class PostCardCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username="author")
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.group = Group.objects.create(title="Группа", slug="group")
+        self.edited = Post.objects.create(text="пост", author=self.author)
+        self.untouched = Post.objects.create(text="другой",
+                                             author=self.author)
+
+    def card_key(self, post):
+        post.refresh_from_db()
+        return caching.card_key(post, caching.version(caching.GROUPS))
+
+    def test_cards_cached_on_render(self):
+        """Проверяем, что лента кладёт карточки постов в кэш"""
+        self.author_client.get(reverse("index"))
+        for post in (self.edited, self.untouched):
+            with self.subTest(post=post.pk):
+                self.assertIsNotNone(cache.get(self.card_key(post)))
+
+    def test_edit_invalidates_only_its_card(self):
+        """Проверяем, что правка поста меняет ключ только его карточки"""
+        self.author_client.get(reverse("index"))
+        edited_key = self.card_key(self.edited)
+        untouched_key = self.card_key(self.untouched)
+        self.author_client.post(
+            reverse("post_edit", kwargs={"username": "author",
+                                         "post_id": self.edited.id}),
+            data={"text": "новый текст", "group": self.group.id}
+        )
+        self.assertNotEqual(self.card_key(self.edited), edited_key)
+        self.assertEqual(self.card_key(self.untouched), untouched_key)
+        page = self.author_client.get(reverse("index")).content.decode()
+        self.assertIn("новый текст", page)
+        self.assertIn("Сообщество Группа", page)
+
+    def test_new_group_keeps_cards(self):
+        """Проверяем, что новая группа не сбрасывает карточки, но меняет
+        ETag списка групп"""
+        key = self.card_key(self.untouched)
+        etag = self.author_client.get(reverse("api:groups"))["ETag"]
+        Group.objects.create(title="Новая", slug="new")
+        self.assertEqual(self.card_key(self.untouched), key)
+        response = self.author_client.get(reverse("api:groups"),
+                                          HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class FeedVersionTest(TestCase):
+    def test_bump_is_one_update(self):
+        """Проверяем, что сброс существующих версий — один UPDATE,
+        сколько бы версий ни было в таблице"""
+        scopes = [caching.author_scope(author_id) for author_id in range(50)]
+        caching.bump(*scopes)
+        before = caching.version(caching.author_scope(1))
+        with self.assertNumQueries(1):
+            caching.bump(caching.author_scope(1), caching.author_scope(2))
+        self.assertNotEqual(caching.version(caching.author_scope(1)), before)
+
+    def test_epoch_changes_every_version(self):
+        """Проверяем, что сброс эпохи меняет версию любого набора лент"""
+        caching.bump(caching.EPOCH, caching.INDEX, caching.author_scope(1))
+        index = caching.version(caching.INDEX)
+        author = caching.version(caching.author_scope(1), caching.GROUPS)
+        with self.assertNumQueries(1):
+            caching.bump(caching.EPOCH)
+        self.assertNotEqual(caching.version(caching.INDEX), index)
+        self.assertNotEqual(
+            caching.version(caching.author_scope(1), caching.GROUPS), author
+        )
@@ -0,0 +1,44 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Post, User
+
+
+@override_settings(COMMENTS_PER_PAGE=2)
+class CommentPagesTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username="author")
+        self.post = Post.objects.create(text="пост", author=self.author)
+        self.comments = [
+            Comment.objects.create(text=f"комментарий {number}",
+                                   author=self.author, post=self.post)
+            for number in range(5)
+        ]
+        self.client = Client()
+
+    def test_first_page_inline(self):
+        """Проверяем, что на странице поста только первая страница
+        комментариев и ссылка на продолжение"""
+        response = self.client.get(
+            reverse("post", args=["author", self.post.id]))
+        self.assertEqual(list(response.context["comments"]),
+                         self.comments[:2])
+        self.assertContains(response, "data-fragment")
+        self.assertNotContains(response, "комментарий 2")
+
+    def test_fragments_continue_thread(self):
+        """Проверяем, что фрагменты по курсору отдают остальные
+        комментарии по порядку"""
+        url = reverse("post_comments", args=["author", self.post.id])
+        seen = []
+        cursor = ""
+        while cursor is not None:
+            response = self.client.get(url, {"cursor": cursor})
+            self.assertTemplateUsed(response, "includes/comment_list.html")
+            page = response.context["comments"]
+            seen += list(page)
+            cursor = page.next_cursor
+        self.assertEqual(seen, self.comments)
+        self.assertNotContains(response, "data-fragment")
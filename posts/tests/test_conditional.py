@@ -0,0 +1,70 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post, User
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username="author")
+        self.group = Group.objects.create(title="Группа", slug="group")
+        self.post = Post.objects.create(text="пост", author=self.author,
+                                        group=self.group)
+        self.client = Client()
+        self.post_url = reverse("post", kwargs={"username": "author",
+                                                "post_id": self.post.id})
+
+    def assert_not_modified(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.has_header("ETag"))
+        self.assertTrue(response.has_header("Last-Modified"))
+        repeated = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(repeated.status_code, 304)
+        return response["ETag"]
+
+    def test_feeds_return_not_modified(self):
+        """Проверяем, что неизменившиеся страницы отдают 304"""
+        urls = (
+            reverse("index"),
+            reverse("group_posts", kwargs={"slug": "group"}),
+            reverse("profile", kwargs={"username": "author"}),
+            self.post_url,
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assert_not_modified(url)
+
+    def test_new_post_changes_etag(self):
+        """Проверяем, что новый пост меняет ETag ленты"""
+        etag = self.assert_not_modified(reverse("index"))
+        Post.objects.create(text="ещё пост", author=self.author)
+        response = self.client.get(reverse("index"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_comment_changes_post_etag(self):
+        """Проверяем, что новый комментарий меняет ETag страницы поста"""
+        etag = self.assert_not_modified(self.post_url)
+        Comment.objects.create(text="комментарий", author=self.author,
+                               post=self.post)
+        response = self.client.get(self.post_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_depends_on_viewer(self):
+        """Проверяем, что ETag различается для разных пользователей"""
+        etag = self.assert_not_modified(reverse("index"))
+        self.client.force_login(self.author)
+        response = self.client.get(reverse("index"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_group_rename_changes_post_etag(self):
+        """Проверяем, что переименование группы меняет ETag страницы
+        поста, на которой выводится её название"""
+        etag = self.assert_not_modified(self.post_url)
+        self.group.title = "Новое название"
+        self.group.save()
+        response = self.client.get(self.post_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Новое название")
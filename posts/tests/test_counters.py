@@ -0,0 +1,82 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Post, User, UserStats
+
+
+class CountersTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create(username="author")
+        self.reader = User.objects.create(username="reader")
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.post = Post.objects.create(text="пост", author=self.author)
+
+    def stats(self, user):
+        return UserStats.objects.get(user=user)
+
+    def test_follow_counters(self):
+        """Проверяем счётчики подписчиков и подписок"""
+        self.reader_client.get(
+            reverse("profile_follow", kwargs={"username": "author"}))
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
+        self.reader_client.get(
+            reverse("profile_unfollow", kwargs={"username": "author"}))
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+        self.assertEqual(self.stats(self.reader).following_count, 0)
+
+    def test_post_and_comment_counters(self):
+        """Проверяем счётчики записей и комментариев"""
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.reader_client.post(
+            reverse("add_comment", kwargs={"username": "author",
+                                           "post_id": self.post.id}),
+            data={"text": "комментарий"}
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+        self.post.delete()
+        self.assertEqual(self.stats(self.author).posts_count, 0)
+
+    def test_rebuild_counters_fixes_drift(self):
+        """Проверяем, что команда пересчёта исправляет рассинхронизацию"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Comment.objects.create(text="к", author=self.reader, post=self.post)
+        UserStats.objects.update(followers_count=42, posts_count=0)
+        Post.objects.update(comment_count=7)
+        call_command("rebuild_counters", batch_size=1, stdout=StringIO())
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+
+    def test_profile_runs_no_aggregate_queries(self):
+        """Проверяем, что страница профиля не выполняет COUNT-запросов"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.reader_client.get(
+                reverse("profile", kwargs={"username": "author"}))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(
+            [q for q in queries if "COUNT(" in q["sql"].upper()]
+        )
+
+    def test_pages_without_stats_row(self):
+        """Проверяем, что профиль и пост открываются и без строки
+        счётчиков, показывая посчитанные значения"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        UserStats.objects.filter(user=self.author).delete()
+        for url in (reverse("profile", kwargs={"username": "author"}),
+                    reverse("post", kwargs={"username": "author",
+                                            "post_id": self.post.id})):
+            with self.subTest(url=url):
+                response = self.reader_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    response.context["author"].stats.followers_count, 1
+                )
@@ -0,0 +1,99 @@
+import csv
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post, User
+
+
+class ExportTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create(username="author")
+        self.group = Group.objects.create(title="Группа", slug="group")
+        self.post = Post.objects.create(text="пост", author=self.author,
+                                        group=self.group)
+        self.comment = Comment.objects.create(text="комментарий",
+                                              author=self.author,
+                                              post=self.post)
+        self.client = Client()
+        self.client.force_login(self.author)
+        self.url = reverse("profile_export", kwargs={"username": "author"})
+
+    def read(self, response):
+        return b"".join(response.streaming_content).decode()
+
+    def test_ndjson_stream(self):
+        """Проверяем потоковую выгрузку постов и комментариев в NDJSON"""
+        response = self.client.get(self.url)
+        self.assertTrue(response.streaming)
+        rows = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual([row["type"] for row in rows], ["post", "comment"])
+        self.assertEqual(rows[0]["group"], "group")
+        self.assertEqual(rows[1]["post"], self.post.id)
+
+    def test_csv_stream(self):
+        """Проверяем, что CSV содержит записи одного типа"""
+        response = self.client.get(self.url, {"format": "csv"})
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        rows = list(csv.DictReader(StringIO(self.read(response))))
+        self.assertEqual([row["text"] for row in rows], ["пост"])
+        response = self.client.get(self.url, {"format": "csv",
+                                              "type": "comment"})
+        rows = list(csv.DictReader(StringIO(self.read(response))))
+        self.assertEqual([row["text"] for row in rows], ["комментарий"])
+        self.assertIn("parent", rows[0])
+
+    def test_only_owner_can_export(self):
+        """Проверяем, что чужую историю выгрузить нельзя"""
+        other = Client()
+        other.force_login(User.objects.create(username="other"))
+        response = other.get(self.url)
+        self.assertRedirects(response, reverse("profile",
+                                               kwargs={"username": "author"}))
+
+    def export(self, suffix, **options):
+        out = StringIO()
+        call_command("export_posts", "author", stdout=out, **options)
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with open(handle, "w", encoding="utf-8", newline="") as target:
+            target.write(out.getvalue())
+        self.addCleanup(os.remove, path)
+        return path
+
+    def reply(self):
+        return Comment.objects.create(text="ответ", author=self.author,
+                                      post=self.post, parent=self.comment)
+
+    def assert_restored(self, reply):
+        post = Post.objects.get(id=self.post.id)
+        self.assertEqual(post.group, self.group)
+        restored = post.comments.get(id=reply.id)
+        self.assertEqual(restored.parent_id, self.comment.id)
+        self.assertEqual((restored.path, restored.depth),
+                         (reply.path, reply.depth))
+        self.assertEqual(post.comment_count, 2)
+
+    def test_command_round_trips_with_import(self):
+        """Проверяем, что выгрузка команды снова загружается импортом
+        вместе с ветками ответов"""
+        reply = self.reply()
+        path = self.export(".jsonl")
+        Post.objects.all().delete()
+        call_command("import_archive", path, stdout=StringIO())
+        self.assert_restored(reply)
+
+    def test_csv_round_trip(self):
+        """Проверяем, что CSV-выгрузки по типам загружаются импортом"""
+        reply = self.reply()
+        posts = self.export(".csv", format="csv", type="post")
+        comments = self.export(".csv", format="csv", type="comment")
+        Post.objects.all().delete()
+        call_command("import_archive", posts, type="post", stdout=StringIO())
+        call_command("import_archive", comments, type="comment",
+                     stdout=StringIO())
+        self.assert_restored(reply)
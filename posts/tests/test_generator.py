@@ -0,0 +1,69 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from posts.models import (Comment, Follow, Group, Post, TimelineEntry,
+                          User)
+
+MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class GenerateDatasetTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def generate(self, **options):
+        defaults = {"users": 30, "groups": 3, "posts": 200, "comments": 400,
+                    "follows": 100, "seed": 7, "batch_size": 50}
+        call_command("generate_dataset", stdout=StringIO(),
+                     **{**defaults, **options})
+
+    def snapshot(self):
+        return (
+            list(Post.objects.order_by("pub_date").values_list(
+                "text", "author__username", "pub_date", "comment_count")),
+            sorted(Follow.objects.values_list("user__username",
+                                              "author__username")),
+        )
+
+    def test_counts_and_derived_data(self):
+        """Проверяем объёмы и согласованность производных данных"""
+        self.generate(images=2, image_ratio=0.5)
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Follow.objects.count(), 100)
+        self.assertTrue(Post.objects.exclude(image=None).exists())
+        post = Post.objects.order_by("?").first()
+        self.assertEqual(post.comment_count, post.comments.count())
+        author = User.objects.get(pk=post.author_id)
+        self.assertEqual(author.stats.posts_count, author.posts.count())
+        self.assertEqual(
+            TimelineEntry.objects.filter(post=post).count(),
+            Follow.objects.filter(author=author).count()
+        )
+        self.assertAlmostEqual(Comment.objects.count(), 400, delta=120)
+
+    def test_follows_follow_power_law(self):
+        """Проверяем, что подписчики сосредоточены у немногих авторов"""
+        self.generate()
+        counts = sorted(
+            (Follow.objects.filter(author=user).count()
+             for user in User.objects.all()), reverse=True
+        )
+        self.assertGreater(sum(counts[:3]), sum(counts) / 3)
+
+    def test_same_seed_same_data(self):
+        """Проверяем, что одно зерно даёт одинаковые данные"""
+        self.generate()
+        first = self.snapshot()
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        self.generate()
+        self.assertEqual(self.snapshot(), first)
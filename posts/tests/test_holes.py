@@ -0,0 +1,52 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Follow, Post, User
+
+
+class HolePunchedCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username="author")
+        self.reader = User.objects.create(username="reader")
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.post = Post.objects.create(text="пост", author=self.author)
+        self.edit_url = reverse("post_edit",
+                                kwargs={"username": "author",
+                                        "post_id": self.post.id})
+        self.profile_url = reverse("profile", kwargs={"username": "author"})
+
+    def test_edit_controls_not_leaked_from_cache(self):
+        """Проверяем, что кнопки редактирования из кэша видит только автор"""
+        for url in (reverse("index"), self.profile_url):
+            with self.subTest(url=url):
+                author_page = self.author_client.get(url).content.decode()
+                reader_page = self.reader_client.get(url).content.decode()
+                self.assertIn(self.edit_url, author_page)
+                self.assertNotIn(self.edit_url, reader_page)
+
+    def test_follow_state_filled_per_viewer(self):
+        """Проверяем, что кнопка подписки в общем кэше своя у каждого"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        stranger = User.objects.create(username="stranger")
+        stranger_client = Client()
+        stranger_client.force_login(stranger)
+        unfollow_url = reverse("profile_unfollow",
+                               kwargs={"username": "author"})
+        follow_url = reverse("profile_follow", kwargs={"username": "author"})
+        reader_page = self.reader_client.get(self.profile_url)
+        stranger_page = stranger_client.get(self.profile_url)
+        self.assertIn(unfollow_url, reader_page.content.decode())
+        self.assertIn(follow_url, stranger_page.content.decode())
+        self.assertNotIn(unfollow_url, stranger_page.content.decode())
+
+    def test_cached_fragment_is_shared(self):
+        """Проверяем, что фрагмент в кэше не зависит от зрителя"""
+        self.author_client.get(reverse("index"))
+        Post.objects.filter(pk=self.post.pk).update(text="в обход сигналов")
+        reader_page = self.reader_client.get(reverse("index"))
+        self.assertNotIn("в обход сигналов", reader_page.content.decode())
@@ -0,0 +1,107 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.importer import ArchiveImporter, read_records
+from posts.models import Comment, Follow, Group, Post, TimelineEntry, User
+
+
+@override_settings(TASKS_EAGER=True)
+class ImportArchiveTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, "w", encoding="utf-8") as target:
+            target.write(content)
+        return path
+
+    def archive(self, records):
+        return self.write("archive.jsonl",
+                          "\n".join(json.dumps(item) for item in records))
+
+    def test_jsonl_import(self):
+        """Проверяем импорт всех типов записей с сохранением дат"""
+        path = self.archive([
+            {"type": "group", "slug": "cats", "title": "Котики"},
+            {"type": "post", "id": 7, "text": "мяу", "author": "tom",
+             "group": "cats", "pub_date": "2015-05-01T10:00:00+00:00"},
+            {"type": "comment", "post": 7, "text": "мур", "author": "jerry"},
+            {"type": "follow", "user": "jerry", "author": "tom"},
+        ])
+        call_command("import_archive", path, batch_size=2, stdout=StringIO())
+        post = Post.objects.get(id=7)
+        self.assertEqual(post.pub_date.year, 2015)
+        self.assertEqual(post.group, Group.objects.get(slug="cats"))
+        self.assertEqual(post.comment_count, 1)
+        jerry = User.objects.get(username="jerry")
+        self.assertEqual(Comment.objects.get().author, jerry)
+        self.assertEqual(post.author.stats.followers_count, 1)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=jerry, post=post).exists())
+
+    def test_csv_import(self):
+        """Проверяем импорт постов из CSV"""
+        path = self.write("posts.csv", "text,author\nпервый,tom\nвторой,tom\n")
+        call_command("import_archive", path, type="post", stdout=StringIO())
+        author = User.objects.get(username="tom")
+        self.assertEqual(author.posts.count(), 2)
+        self.assertEqual(author.stats.posts_count, 2)
+
+    def test_resume_from_checkpoint(self):
+        """Проверяем, что прерванный импорт продолжается с контрольной
+        точки без дублей"""
+        path = self.archive([
+            {"type": "post", "text": "первый", "author": "tom"},
+            {"type": "post", "text": "второй", "author": "tom"},
+            {"type": "post", "text": "третий", "author": "tom"},
+        ])
+        checkpoint = os.path.join(self.directory, "checkpoint.json")
+        with open(checkpoint, "w") as target:
+            json.dump({"line": 2}, target)
+        call_command("import_archive", path, checkpoint=checkpoint,
+                     stdout=StringIO())
+        self.assertEqual(list(Post.objects.values_list("text", flat=True)),
+                         ["третий"])
+        call_command("import_archive", path, checkpoint=checkpoint,
+                     stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 1)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_finish_covers_crashed_run(self):
+        """Проверяем, что профиль открывается и после падения, а после
+        возобновления ленты и поиск догоняют и записи упавшего запуска"""
+        path = self.archive([
+            {"type": "follow", "user": "jerry", "author": "tom"},
+            {"type": "post", "text": "котики спят", "author": "tom"},
+            {"type": "post", "text": "собака лает", "author": "spike"},
+        ])
+        checkpoint = os.path.join(self.directory, "checkpoint.json")
+
+        def crash(records):
+            for line, record in records:
+                if line == 3:
+                    raise RuntimeError("сбой")
+                yield line, record
+
+        importer = ArchiveImporter(batch_size=2, checkpoint=checkpoint)
+        with self.assertRaises(RuntimeError):
+            importer.run(crash(read_records(path, "jsonl")))
+        profile = self.client.get(reverse("profile", args=["tom"]))
+        self.assertEqual(profile.status_code, 200)
+        call_command("import_archive", path, checkpoint=checkpoint,
+                     stdout=StringIO())
+        post = Post.objects.get(text="котики спят")
+        self.assertTrue(TimelineEntry.objects.filter(
+            user__username="jerry", post=post).exists())
+        found = self.client.get(reverse("search_json"), {"q": "котики"})
+        self.assertEqual([item["id"] for item in found.json()["results"]],
+                         [post.id])
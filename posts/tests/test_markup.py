@@ -0,0 +1,65 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import rendering
+from posts.models import Comment, Post, User
+
+
+class MarkupTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username="author")
+        self.post = Post.objects.create(text="пост", author=self.author)
+
+    def test_links_mentions_and_tags(self):
+        """Проверяем ссылки, упоминания и хэштеги в тексте"""
+        html = rendering.render(
+            "Смотри https://example.com/a?b=1&c=2, @author и #котики!")
+        self.assertIn('<a href="https://example.com/a?b=1&amp;c=2" '
+                      'rel="nofollow noopener">', html)
+        self.assertIn('>https://example.com/a?b=1&amp;c=2</a>, ', html)
+        self.assertIn(f'<a href="{reverse("profile", args=["author"])}">'
+                      '@author</a>', html)
+        self.assertIn('#котики</a>!', html)
+        self.assertIn(reverse("search"), html)
+
+    def test_text_is_escaped(self):
+        """Проверяем, что разметка пользователя экранируется"""
+        html = rendering.render(
+            '<script>alert(1)</script>\nhttp://x.ru/"onmouseover=a')
+        self.assertNotIn("<script>", html)
+        self.assertIn("&lt;script&gt;", html)
+        self.assertIn('<a href="http://x.ru/" rel="nofollow noopener">'
+                      'http://x.ru/</a>&quot;onmouseover=a', html)
+        self.assertEqual(html.count("<br>"), 1)
+
+    def test_email_is_not_mention(self):
+        """Проверяем, что адрес почты не превращается в упоминание"""
+        self.assertEqual(rendering.render("me@author.ru"), "me@author.ru")
+
+    def test_comment_rendered_on_save(self):
+        """Проверяем, что комментарий отрисовывается при сохранении
+        и выводится на странице поста готовым HTML"""
+        comment = Comment.objects.create(
+            text="привет, @author", author=self.author, post=self.post)
+        self.assertIn('@author</a>', comment.text_html)
+        self.assertEqual(comment.render_version, rendering.VERSION)
+        response = Client().get(
+            reverse("post", args=["author", self.post.id]))
+        self.assertContains(response, comment.text_html, html=True)
+
+    def test_rebuild_command(self):
+        """Проверяем, что команда перерисовывает устаревшие строки"""
+        Post.objects.update(text="#новое", text_html="", render_version=0)
+        Comment.objects.create(text="комментарий", author=self.author,
+                               post=self.post)
+        out = StringIO()
+        call_command("rebuild_rendered_text", batch_size=1, stdout=out)
+        self.assertIn("постов 1, комментариев 0", out.getvalue())
+        self.post.refresh_from_db()
+        self.assertIn("#новое</a>", self.post.text_html)
+        self.assertEqual(self.post.render_version, rendering.VERSION)
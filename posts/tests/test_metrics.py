@@ -0,0 +1,122 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+
+from django.conf import settings
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+from yatube import metrics
+
+METRICS_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(METRICS_DIR=METRICS_DIR, TIMING_SAMPLE_RATE=1,
+                   METRICS_TOKEN="secret", METRICS_ALLOWED_IPS=[])
+class MetricsTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(METRICS_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        metrics.registry.values.clear()
+        for name in os.listdir(METRICS_DIR):
+            os.remove(os.path.join(METRICS_DIR, name))
+        self.author = User.objects.create(username="author")
+        Post.objects.create(text="пост", author=self.author)
+        self.client = Client()
+
+    def scrape(self):
+        response = self.client.get(reverse("metrics"),
+                                   HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_labelled_by_url_name(self):
+        """Проверяем, что метрики подписаны именем адреса, а не путём"""
+        self.client.get(reverse("index"))
+        self.client.get(reverse("profile", kwargs={"username": "author"}))
+        self.client.get("/nobody/")
+        text = self.scrape()
+        self.assertIn('yatube_requests_total{status="200",view="index"} 1',
+                      text)
+        self.assertIn('yatube_request_duration_seconds_count'
+                      '{view="profile"} 2', text)
+        self.assertIn('yatube_requests_total{status="404",view="profile"}',
+                      text)
+        self.assertIn('yatube_cache_hit_ratio{view="index"}', text)
+        self.assertNotIn("author", text)
+
+    def test_workers_aggregated(self):
+        """Проверяем, что счётчики других процессов складываются"""
+        other = [["yatube_requests_total",
+                  [["status", "200"], ["view", "index"]], 5]]
+        with open(os.path.join(METRICS_DIR, "1.json"), "w") as target:
+            json.dump(other, target)
+        self.client.get(reverse("index"))
+        self.assertIn('yatube_requests_total{status="200",view="index"} 6',
+                      self.scrape())
+
+    def test_dead_worker_retired(self):
+        """Проверяем, что файл завершившегося процесса переносится в
+        retired.json без потери значений, а свой файл процесса не
+        совпадает с файлом по одному pid"""
+        finished = subprocess.Popen([sys.executable, "-c", "pass"])
+        finished.wait()
+        other = [["yatube_requests_total",
+                  [["status", "200"], ["view", "index"]], 5]]
+        name = f"{finished.pid}-0000.json"
+        with open(os.path.join(METRICS_DIR, name), "w") as target:
+            json.dump(other, target)
+        self.client.get(reverse("index"))
+        expected = 'yatube_requests_total{status="200",view="index"} 6'
+        self.assertIn(expected, self.scrape())
+        self.assertIn(expected, self.scrape())
+        files = os.listdir(METRICS_DIR)
+        self.assertNotIn(name, files)
+        self.assertIn(metrics.RETIRED, files)
+        self.assertNotIn(f"{os.getpid()}.json", files)
+        self.assertIn(metrics.registry.filename(), files)
+
+    def test_concurrent_flush(self):
+        """Проверяем, что одновременные сбросы из нескольких потоков не
+        падают и не оставляют временных файлов"""
+        errors = []
+
+        def work():
+            try:
+                for _ in range(100):
+                    with metrics.registry.lock:
+                        metrics.registry.inc("yatube_requests_total",
+                                             {"view": "index"})
+                    metrics.registry.flush()
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(os.listdir(METRICS_DIR),
+                         [metrics.registry.filename()])
+        self.assertIn('yatube_requests_total{view="index"} 400',
+                      self.scrape())
+
+    def test_access(self):
+        """Проверяем, что метрики отдаются только с токеном или с
+        разрешённого адреса, но не всем локальным запросам"""
+        url = reverse("metrics")
+        self.assertEqual(self.client.get(url).status_code, 404)
+        response = self.client.get(url, HTTP_AUTHORIZATION="Bearer wrong")
+        self.assertEqual(response.status_code, 404)
+        with self.settings(METRICS_ALLOWED_IPS=["10.0.0.1"]):
+            response = self.client.get(url, REMOTE_ADDR="10.0.0.1")
+        self.assertEqual(response.status_code, 200)
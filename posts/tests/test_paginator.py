@@ -0,0 +1,72 @@
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Post, User
+from posts.paginator import CursorPage, CursorPaginator
+
+
+@override_settings(POSTS_PER_PAGE=10, PAGINATOR_SHALLOW_PAGES=2)
+class CursorPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username="Vlad")
+        for number_post in range(25):
+            Post.objects.create(
+                text=f"Текст поста {number_post}",
+                author=cls.user
+            )
+        cls.posts = list(Post.objects.order_by("-pub_date", "-id"))
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_cursor_pages_cover_feed(self):
+        """Проверяем, что курсоры проходят ленту без пропусков и повторов"""
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        page = paginator.get_page(None)
+        seen = list(page)
+        while page.has_next():
+            page = paginator.get_page(page.next_cursor)
+            seen.extend(page)
+        self.assertEqual(seen, self.posts)
+
+    def test_previous_cursor(self):
+        """Проверяем возврат на предыдущую страницу по курсору"""
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        first = paginator.get_page(None)
+        second = paginator.get_page(first.next_cursor)
+        back = paginator.get_page(second.previous_cursor)
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+        self.assertTrue(back.has_next())
+
+    def test_cursor_page_skips_count(self):
+        """Проверяем, что страница по курсору не выполняет COUNT(*)"""
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        cursor = paginator.encode_cursor("next", self.posts[9])
+        with CaptureQueriesContext(connection) as queries:
+            page = paginator.get_page(cursor)
+        self.assertIsInstance(page, CursorPage)
+        self.assertEqual(list(page), self.posts[10:20])
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("COUNT", queries[0]["sql"])
+        self.assertNotIn("OFFSET", queries[0]["sql"])
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        """Проверяем, что испорченный курсор отдаёт первую страницу"""
+        response = self.guest_client.get(reverse("index") + "?cursor=%%%")
+        self.assertEqual(list(response.context["page"]), self.posts[:10])
+
+    def test_shallow_page_hands_off_to_cursor(self):
+        """Проверяем, что последняя «мелкая» страница ведёт на курсор"""
+        response = self.guest_client.get(reverse("index") + "?page=2")
+        page = response.context["page"]
+        self.assertEqual(page.number, 2)
+        self.assertIsNotNone(page.next_cursor)
+        response = self.guest_client.get(
+            reverse("index") + f"?cursor={page.next_cursor}"
+        )
+        self.assertEqual(list(response.context["page"]), self.posts[20:])
@@ -0,0 +1,59 @@
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.test import Client, TestCase
+from django.urls import resolve, reverse
+
+from posts import benchmarks
+from posts.models import Post
+from yatube import queries
+
+
+class QueryBudgetTest(TestCase):
+    def setUp(self):
+        benchmarks.generate(100, seed=5, batch_size=50)
+        self.fixture = benchmarks.fixtures()
+        self.clients = {}
+
+    def client_for(self, user):
+        if user.pk not in self.clients:
+            self.clients[user.pk] = Client()
+            self.clients[user.pk].force_login(user)
+        return self.clients[user.pk]
+
+    def assert_within_budget(self, method, url, data, user):
+        budget = resolve(url).func.query_budget
+        client = self.client_for(user)
+        cache.clear()
+        with queries.detect() as detector:
+            response = getattr(client, method)(url, data)
+            if response.streaming:
+                b"".join(response.streaming_content)
+        self.assertLessEqual(detector.count, budget, detector.report())
+        self.assertEqual(detector.repeated(), [])
+
+    def test_views_within_budget(self):
+        """Проверяем, что представления укладываются в бюджет запросов
+        на холодном кэше"""
+        for name, method, url, data, user in benchmarks.targets(
+                self.fixture):
+            with self.subTest(name=name):
+                self.assert_within_budget(method, url, data, user)
+
+    def test_post_delete_within_budget(self):
+        """Проверяем, что удаление поста с комментариями не делает
+        запрос на каждый комментарий"""
+        post = Post.objects.filter(comment_count__gte=3).first()
+        url = reverse("post_delete", args=[post.author.username, post.id])
+        self.assert_within_budget("post", url, None, post.author)
+
+    def test_detector_points_to_template_line(self):
+        """Проверяем, что детектор находит N+1 и строку шаблона"""
+        post = Post.objects.filter(comment_count__gte=3).first()
+        with queries.detect() as detector:
+            render_to_string("includes/comment_list.html", {
+                "post": post, "comments": post.comments.all(),
+            })
+        location, shape, count = detector.repeated()[0]
+        self.assertTrue(location.startswith("includes/comment_list.html:"))
+        self.assertIn("auth_user", shape)
+        self.assertEqual(count, post.comment_count)
@@ -0,0 +1,39 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from posts import query_plans
+from posts.models import Follow, Post, User
+
+
+class QueryPlanTest(TestCase):
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_feed_queries_use_indexes(self):
+        """Проверяем, что все запросы лент идут по индексам, включая
+        слияние с записями знаменитости"""
+        author = User.objects.create(username="author")
+        Follow.objects.create(user=User.objects.create(username="reader"),
+                              author=author)
+        Post.objects.create(text="пост", author=author)
+        out = StringIO()
+        call_command("check_query_plans", stdout=out)
+        self.assertIn("post_feed_idx", out.getvalue())
+        self.assertIn("timeline_user_feed_idx", out.getvalue())
+        self.assertIn("follow_index merged celebrity (cursor)",
+                      out.getvalue())
+        self.assertIn("post_author_feed_idx", out.getvalue())
+
+    def test_empty_database_checks_both_merge_sources(self):
+        """Проверяем, что на пустой базе проверяются и записи ленты, и
+        записи знаменитости"""
+        queries = query_plans.feed_queries()
+        self.assertIn("follow_index merged timeline", queries)
+        self.assertIn("follow_index merged celebrity", queries)
+        plan = query_plans.explain(queries["follow_index merged timeline"])
+        self.assertIn("timeline_user_feed_idx", " ".join(plan))
+
+    def test_problems_detected(self):
+        """Проверяем, что сортировка без индекса считается проблемой"""
+        plan = query_plans.explain(Post.objects.order_by("text"))
+        self.assertTrue(query_plans.problems(plan))
@@ -0,0 +1,52 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Follow, Post, User
+
+
+@override_settings(POST_EXCERPT_LENGTH=20)
+class RenderedTextTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username="author")
+        self.post = Post.objects.create(
+            text="Начало длинного поста <b>\nи его продолжение до конца",
+            author=self.author
+        )
+        self.reader = User.objects.create(username="reader")
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_rendered_on_save(self):
+        """Проверяем, что HTML и превью считаются при сохранении"""
+        self.assertIn("&lt;b&gt;<br>", self.post.text_html)
+        self.assertTrue(self.post.excerpt_html.endswith("…"))
+        self.post.text = "новый текст"
+        self.post.save()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.excerpt_html, "новый текст")
+
+    def test_feeds_show_excerpt_without_full_text(self):
+        """Проверяем, что ленты не читают полный текст и показывают
+        превью"""
+        urls = (
+            reverse("index"),
+            reverse("follow_index"),
+            reverse("profile", args=["author"]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                post = response.context["page"][0]
+                self.assertTrue(set(Post.CARD_DEFERRED)
+                                <= post.get_deferred_fields())
+                self.assertContains(response, self.post.excerpt_html)
+                self.assertNotContains(response, "до конца")
+
+    def test_post_page_shows_full_text(self):
+        """Проверяем, что страница поста показывает весь текст"""
+        response = self.client.get(
+            reverse("post", args=["author", self.post.id]))
+        self.assertContains(response, self.post.text_html)
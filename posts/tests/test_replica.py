@@ -0,0 +1,132 @@
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import closing
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+from django.utils import timezone
+
+from posts.models import Post
+from yatube import replica
+
+ROUTER = replica.ReplicaRouter()
+
+
+class SharedCacheTestCase(SimpleTestCase):
+    def setUp(self):
+        # Отметка синхронизации — в своём каталоге, а не в общем кэше
+        # машины, который видят запущенные рядом процессы.
+        self.shared = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.shared, ignore_errors=True)
+        override = self.settings(CACHES={
+            **settings.CACHES,
+            "shared": {**settings.CACHES["shared"], "LOCATION": self.shared},
+        })
+        override.enable()
+        self.addCleanup(override.disable)
+
+
+@mock.patch("yatube.replica.replica_configured", return_value=True)
+class ReplicaRouterTest(SharedCacheTestCase):
+    def request(self, method="get", cookies=None, write=False):
+        """Прогоняет запрос через middleware и возвращает базы, которые
+        роутер выбрал для чтения до и после записи."""
+        seen = []
+
+        def view(request):
+            seen.append(ROUTER.db_for_read(Post))
+            if write:
+                ROUTER.db_for_write(Post)
+                seen.append(ROUTER.db_for_read(Post))
+            return HttpResponse()
+
+        request = getattr(RequestFactory(), method)("/")
+        request.COOKIES.update(cookies or {})
+        response = replica.ReplicaMiddleware(view)(request)
+        return seen, response
+
+    def test_reads_go_to_replica(self, configured):
+        """Проверяем, что чтения в GET-запросе идут на реплику"""
+        seen, response = self.request()
+        self.assertEqual(seen, [replica.REPLICA])
+        self.assertNotIn(replica.PIN_COOKIE, response.cookies)
+
+    def test_write_pins_to_primary(self, configured):
+        """Проверяем, что после записи запрос и клиент читают с основной"""
+        seen, response = self.request(method="post", write=True)
+        self.assertEqual(seen, ["default", "default"])
+        self.assertIn(replica.PIN_COOKIE, response.cookies)
+        seen, _ = self.request(cookies={replica.PIN_COOKIE: "1"})
+        self.assertEqual(seen, ["default"])
+
+    def test_write_inside_get_switches_to_primary(self, configured):
+        """Проверяем, что запись посреди GET переводит чтения на основную"""
+        seen, _ = self.request(write=True)
+        self.assertEqual(seen, [replica.REPLICA, "default"])
+
+    def test_stale_replica_not_used(self, configured):
+        """Проверяем, что реплика, отстающая от версии ленты, не читается"""
+        def view(request):
+            replica.require_fresh(timezone.now())
+            return HttpResponse(ROUTER.db_for_read(Post))
+
+        synced = caches[replica.SYNC_CACHE]
+        synced.set(replica.SYNCED_KEY, time.time() - 60)
+        response = replica.ReplicaMiddleware(view)(RequestFactory().get("/"))
+        self.assertEqual(response.content, b"default")
+        synced.set(replica.SYNCED_KEY, time.time() + 60)
+        response = replica.ReplicaMiddleware(view)(RequestFactory().get("/"))
+        self.assertEqual(response.content, replica.REPLICA.encode())
+
+    def test_sync_seen_from_other_process(self, configured):
+        """Проверяем, что отметку копировщика из отдельного процесса
+        видит middleware со своим кэшем по умолчанию"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        moment = timezone.now()
+        subprocess.run(
+            [sys.executable, os.path.join(settings.BASE_DIR, "manage.py"),
+             "shell", "-c",
+             "from yatube import replica; replica.copy_database({!r}, {!r})"
+             .format(os.path.join(directory, "primary.sqlite3"),
+                     os.path.join(directory, "replica.sqlite3"))],
+            check=True, cwd=settings.BASE_DIR,
+            env={**os.environ, "YATUBE_SHARED_CACHE": self.shared}
+        )
+        cache.clear()
+
+        def view(request):
+            replica.require_fresh(moment)
+            return HttpResponse(ROUTER.db_for_read(Post))
+
+        response = replica.ReplicaMiddleware(view)(RequestFactory().get("/"))
+        self.assertEqual(response.content, replica.REPLICA.encode())
+
+    def test_outside_request_reads_primary(self, configured):
+        """Проверяем, что команды и воркеры читают с основной базы"""
+        self.assertEqual(ROUTER.db_for_read(Post), "default")
+
+
+class CopyDatabaseTest(SharedCacheTestCase):
+    def test_copy(self):
+        """Проверяем, что копировщик переносит данные в файл реплики"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        source = os.path.join(directory, "primary.sqlite3")
+        target = os.path.join(directory, "replica.sqlite3")
+        with closing(sqlite3.connect(source)) as primary:
+            primary.execute("CREATE TABLE item (name TEXT)")
+            primary.execute("INSERT INTO item VALUES ('пост')")
+            primary.commit()
+        replica.copy_database(source, target)
+        with closing(sqlite3.connect(target)) as copy:
+            rows = copy.execute("SELECT name FROM item").fetchall()
+        self.assertEqual(rows, [("пост",)])
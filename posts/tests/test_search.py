@@ -0,0 +1,71 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import search
+from posts.models import Post, User
+
+
+class SearchTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create(username="author")
+        self.cats = Post.objects.create(
+            text="Смешные котики спят на диване", author=self.user)
+        self.dogs = Post.objects.create(
+            text="Собака гоняет мяч", author=self.user)
+
+    def search(self, query, **params):
+        response = self.client.get(reverse("search_json"),
+                                   {"q": query, **params})
+        return response.json()
+
+    def test_search_is_stemmed(self):
+        """Проверяем, что поиск находит другие формы слова"""
+        ids = [item["id"] for item in self.search("котиков")["results"]]
+        self.assertEqual(ids, [self.cats.id])
+
+    def test_index_follows_edits_and_deletes(self):
+        """Проверяем, что индекс обновляется при правке и удалении"""
+        self.dogs.text = "Собака лежит на диване"
+        self.dogs.save()
+        self.assertEqual(len(self.search("диван")["results"]), 2)
+        self.cats.delete()
+        ids = [item["id"] for item in self.search("диван")["results"]]
+        self.assertEqual(ids, [self.dogs.id])
+
+    def test_results_are_ranked(self):
+        """Проверяем, что более релевантный пост идёт первым"""
+        best = Post.objects.create(text="мяч мяч мяч", author=self.user)
+        ids = [item["id"] for item in self.search("мяч")["results"]]
+        self.assertEqual(ids, [best.id, self.dogs.id])
+
+    @override_settings(POSTS_PER_PAGE=2)
+    def test_cursor_pagination(self):
+        """Проверяем постраничный обход результатов по курсору"""
+        for number in range(3):
+            Post.objects.create(text=f"мяч номер {number}", author=self.user)
+        first = self.search("мяч")
+        second = self.search("мяч", cursor=first["next"])
+        ids = [item["id"] for page in (first, second)
+               for item in page["results"]]
+        self.assertEqual(len(set(ids)), 4)
+        self.assertIsNone(second["next"])
+
+    def test_search_page(self):
+        """Проверяем HTML-страницу поиска"""
+        response = self.client.get(reverse("search"), {"q": "собаки"})
+        self.assertTemplateUsed(response, "posts/search.html")
+        self.assertContains(response, "Собака гоняет мяч")
+        self.assertNotContains(response, "котики")
+
+    def test_rebuild_command(self):
+        """Проверяем, что команда переиндексации восстанавливает индекс"""
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {search.TABLE}")
+        self.assertEqual(self.search("собака")["results"], [])
+        call_command("rebuild_search_index", chunk_size=1, stdout=StringIO())
+        self.assertEqual(len(self.search("собака")["results"]), 1)
@@ -0,0 +1,60 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase
+
+from yatube.sqlite_backend.base import DatabaseWrapper
+
+
+class SqliteProfileTest(SimpleTestCase):
+    # Тест открывает собственное соединение с временным файлом, а не с
+    # тестовой базой; pytest-django без этого запрещает подключение.
+    databases = "__all__"
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.path = os.path.join(directory, "db.sqlite3")
+        self.wrapper = DatabaseWrapper({
+            **connection.settings_dict,
+            "NAME": self.path,
+            "PRAGMAS": settings.SQLITE_PRAGMAS,
+            "IMMEDIATE_TRANSACTIONS": True,
+        })
+        self.addCleanup(self.wrapper.close)
+
+    def pragma(self, name):
+        with self.wrapper.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied(self):
+        """Проверяем, что новое соединение получает PRAGMA профиля"""
+        self.assertEqual(self.pragma("journal_mode"), "wal")
+        self.assertEqual(self.pragma("synchronous"), 1)
+        self.assertEqual(self.pragma("busy_timeout"), 5000)
+
+    def test_transactions_take_write_lock(self):
+        """Проверяем, что транзакция сразу захватывает блокировку записи"""
+        with self.wrapper.cursor() as cursor:
+            cursor.execute("CREATE TABLE item (id INTEGER PRIMARY KEY)")
+        self.wrapper.ensure_connection()
+        self.wrapper._start_transaction_under_autocommit()
+        other = sqlite3.connect(self.path, timeout=0)
+        self.addCleanup(other.close)
+        with self.assertRaises(sqlite3.OperationalError):
+            other.execute("INSERT INTO item DEFAULT VALUES")
+        self.wrapper.connection.rollback()
+
+    def test_benchmark_command(self):
+        """Проверяем, что бенчмарк сравнивает оба профиля"""
+        out = StringIO()
+        call_command("bench_sqlite", seconds=0.2, rows=100, stdout=out)
+        self.assertIn("default", out.getvalue())
+        self.assertIn("production", out.getvalue())
@@ -0,0 +1,87 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import query_plans, threads
+from posts.models import Comment, Post, User
+
+
+class ThreadTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="author")
+        self.post = Post.objects.create(text="пост", author=self.user)
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def comment(self, text, parent=None):
+        return Comment.objects.create(text=text, author=self.user,
+                                      post=self.post, parent=parent)
+
+    def test_reply_through_form(self):
+        """Проверяем, что ответ из формы попадает в ветку родителя"""
+        first = self.comment("первый")
+        second = self.comment("второй")
+        page = self.client.get(reverse("post", args=["author", self.post.id]),
+                               {"reply": first.id})
+        self.assertContains(page, f'name="parent" value="{first.id}"')
+        self.client.post(
+            reverse("add_comment", args=["author", self.post.id]),
+            {"text": "ответ", "parent": first.id}
+        )
+        reply = Comment.objects.get(text="ответ")
+        self.assertEqual((reply.parent, reply.depth), (first, 1))
+        self.assertTrue(reply.path.startswith(first.path))
+        self.assertEqual(list(threads.thread(self.post.id)),
+                         [first, reply, second])
+
+    def test_subtree_by_depth_in_one_query(self):
+        """Проверяем выборку поддерева до заданной глубины одним
+        запросом по индексу"""
+        root = self.comment("корень")
+        child = self.comment("ответ", root)
+        self.comment("ответ на ответ", child)
+        self.comment("другой корень")
+        subtree = threads.thread(self.post.id, root, depth=1)
+        with self.assertNumQueries(1):
+            self.assertEqual(list(subtree), [root, child])
+        self.assertEqual(query_plans.problems(query_plans.explain(subtree)),
+                         [])
+
+    @override_settings(COMMENT_MAX_DEPTH=2)
+    def test_depth_is_capped(self):
+        """Проверяем, что слишком глубокий ответ прикрепляется к предку
+        на предельной глубине"""
+        parent = None
+        chain = []
+        for number in range(4):
+            parent = self.comment(f"уровень {number}", parent)
+            chain.append(parent)
+        self.assertEqual([comment.depth for comment in chain], [0, 1, 2, 2])
+        self.assertEqual(chain[3].parent, chain[1])
+
+    @override_settings(COMMENTS_PER_PAGE=2)
+    def test_pages_follow_thread_order(self):
+        """Проверяем, что страницы комментариев идут в порядке ветки"""
+        first = self.comment("первый")
+        second = self.comment("второй")
+        replies = [self.comment(f"ответ {number}", first)
+                   for number in range(2)]
+        url = reverse("post_comments", args=["author", self.post.id])
+        seen = []
+        cursor = ""
+        while cursor is not None:
+            page = self.client.get(url, {"cursor": cursor}).context[
+                "comments"]
+            seen += list(page)
+            cursor = page.next_cursor
+        self.assertEqual(seen, [first, *replies, second])
+
+    def test_bulk_inserted_comments_get_paths(self):
+        """Проверяем заполнение путей после массовой вставки"""
+        Comment.objects.bulk_create([
+            Comment(text="импорт", author=self.user, post=self.post)
+        ])
+        threads.fill_root_paths()
+        comment = Comment.objects.get()
+        self.assertEqual(comment.path, f"{comment.pk:010d}")
@@ -0,0 +1,72 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, TASKS_EAGER=True)
+class ThumbnailTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="author")
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def upload(self, name):
+        return SimpleUploadedFile(name=name, content=SMALL_GIF,
+                                  content_type="image/gif")
+
+    def test_thumbnail_generated_on_upload(self):
+        """Проверяем, что миниатюра готовится при сохранении картинки"""
+        self.authorized_client.post(
+            reverse("new_post"),
+            data={"text": "пост с картинкой", "image": self.upload("a.gif")}
+        )
+        post = Post.objects.get()
+        card_url = post.thumbnail_urls["card"]
+        self.assertNotEqual(card_url, post.image.url)
+        response = self.authorized_client.get(reverse("index"))
+        self.assertContains(response, card_url)
+
+    def test_thumbnail_regenerated_on_edit(self):
+        """Проверяем, что при замене картинки миниатюра обновляется"""
+        post = Post.objects.create(text="пост", author=self.user,
+                                   image=self.upload("a.gif"))
+        post.refresh_from_db()
+        old_url = post.thumbnail_urls["card"]
+        self.authorized_client.post(
+            reverse("post_edit", kwargs={"username": "author",
+                                         "post_id": post.id}),
+            data={"text": "пост", "image": self.upload("b.gif")}
+        )
+        post.refresh_from_db()
+        self.assertFalse(post.thumbnails_stale)
+        self.assertNotEqual(post.thumbnail_urls["card"], old_url)
+
+    @override_settings(TASKS_EAGER=False)
+    def test_card_falls_back_to_original(self):
+        """Проверяем, что до готовности миниатюры показывается оригинал"""
+        post = Post.objects.create(text="пост", author=self.user,
+                                   image=self.upload("c.gif"))
+        self.assertEqual(post.thumbnail_urls["card"], post.image.url)
@@ -0,0 +1,127 @@
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Follow, Post, TimelineEntry, User
+from tasks import queue
+
+
+class TimelineTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create(username="author")
+        self.reader = User.objects.create(username="reader")
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_follow_backfills_timeline(self):
+        """Проверяем, что подписка добавляет старые посты автора в ленту"""
+        post = Post.objects.create(text="старый пост", author=self.author)
+        self.reader_client.get(
+            reverse("profile_follow", kwargs={"username": "author"})
+        )
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=post).exists())
+
+    def test_new_post_fans_out(self):
+        """Проверяем, что новый пост раскладывается по лентам подписчиков"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text="новый пост", author=self.author)
+        response = self.reader_client.get(reverse("follow_index"))
+        self.assertEqual(response.context["page"][0], post)
+
+    def test_unfollow_prunes_timeline(self):
+        """Проверяем, что отписка убирает посты автора из ленты"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Post.objects.create(text="пост", author=self.author)
+        self.reader_client.get(
+            reverse("profile_unfollow", kwargs={"username": "author"})
+        )
+        self.assertFalse(TimelineEntry.objects.filter(
+            user=self.reader).exists())
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_celebrity_posts_merged_on_read(self):
+        """Проверяем, что посты популярного автора подмешиваются при чтении,
+        а не раскладываются по лентам"""
+        fan = User.objects.create(username="fan")
+        Follow.objects.create(user=fan, author=self.author)
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text="пост звезды", author=self.author)
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        response = self.reader_client.get(reverse("follow_index"))
+        self.assertEqual(list(response.context["page"]), [post])
+
+    @override_settings(TIMELINE_INLINE_FANOUT=0, TASKS_EAGER=False)
+    def test_large_fan_out_deferred_to_queue(self):
+        """Проверяем, что раскладка по многим лентам уходит в очередь"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text="пост", author=self.author)
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        queue.run_batch(10)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=post).exists())
+
+    @override_settings(POSTS_PER_PAGE=2)
+    def test_feed_pages_by_cursor(self):
+        """Проверяем обход ленты подписок по курсору"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        posts = [Post.objects.create(text=f"пост {number}",
+                                     author=self.author)
+                 for number in range(3)]
+        first = self.reader_client.get(reverse("follow_index"),
+                                       {"cursor": ""})
+        cursor = first.context["page"].next_cursor
+        second = self.reader_client.get(reverse("follow_index"),
+                                        {"cursor": cursor})
+        seen = list(first.context["page"]) + list(second.context["page"])
+        self.assertEqual(seen, posts[::-1])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1, POSTS_PER_PAGE=2)
+    def test_merged_feed_pages(self):
+        """Проверяем обход слитой ленты по курсору в обе стороны и по
+        номерам страниц, которые не уходят глубже мелких"""
+        star = User.objects.create(username="star")
+        fan = User.objects.create(username="fan")
+        Follow.objects.create(user=fan, author=star)
+        Follow.objects.create(user=self.reader, author=star)
+        Follow.objects.create(user=self.reader, author=self.author)
+        posts = [Post.objects.create(text=f"пост {number}",
+                                     author=(star, self.author)[number % 2])
+                 for number in range(5)]
+        expected = posts[::-1]
+        seen, cursor, pages = [], "", []
+        while cursor is not None:
+            page = self.reader_client.get(reverse("follow_index"),
+                                          {"cursor": cursor}).context["page"]
+            pages.append(page)
+            seen += list(page)
+            cursor = page.next_cursor
+        self.assertEqual(seen, expected)
+        back = self.reader_client.get(
+            reverse("follow_index"), {"cursor": pages[-1].previous_cursor}
+        ).context["page"]
+        self.assertEqual(list(back), expected[2:4])
+        numbered = self.reader_client.get(reverse("follow_index"),
+                                          {"page": 2}).context["page"]
+        self.assertEqual(list(numbered), expected[2:4])
+        self.assertEqual(numbered.paginator.count, 5)
+        with self.settings(PAGINATOR_SHALLOW_PAGES=1):
+            deep = self.reader_client.get(reverse("follow_index"),
+                                          {"page": 3}).context["page"]
+        self.assertEqual(deep.number, 1)
+        self.assertEqual(list(deep), expected[:2])
+        self.assertIsNotNone(deep.next_cursor)
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_former_celebrity_posts_restored(self):
+        """Проверяем, что записи бывшей знаменитости раскладываются по
+        лентам, когда подписчиков становится меньше порога"""
+        fan = User.objects.create(username="fan")
+        Follow.objects.create(user=fan, author=self.author)
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text="пост звезды", author=self.author)
+        Follow.objects.get(user=fan).delete()
+        queue.run_batch(10)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=post).exists())
+        response = self.reader_client.get(reverse("follow_index"))
+        self.assertEqual(list(response.context["page"]), [post])
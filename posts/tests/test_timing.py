@@ -0,0 +1,38 @@
+import json
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+
+class ServerTimingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username="author")
+        Post.objects.create(text="пост", author=self.author)
+        self.client = Client()
+
+    @override_settings(TIMING_SAMPLE_RATE=0)
+    def test_header_without_sampling(self):
+        """Проверяем, что без выборки в заголовке только SQL и общее время"""
+        response = self.client.get(reverse("index"))
+        metrics = [metric.split(";")[0]
+                   for metric in response["Server-Timing"].split(", ")]
+        self.assertEqual(metrics, ["db", "total"])
+        self.assertNotIn('desc="0 SQL"', response["Server-Timing"])
+
+    @override_settings(TIMING_SAMPLE_RATE=1)
+    def test_sampled_breakdown_logged(self):
+        """Проверяем разбивку по шаблонам и кэшу и строку лога"""
+        with self.assertLogs("yatube.timing", "INFO") as logs:
+            self.client.get(reverse("index"))
+            response = self.client.get(reverse("index"))
+        self.assertIn("tpl;dur=", response["Server-Timing"])
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(record["view"], "index")
+        self.assertTrue(record["sampled"])
+        self.assertIn("posts/index.html", record["templates_ms"])
+        self.assertGreater(record["cache_hits"], 0)
+        self.assertGreater(record["db_queries"], 0)
@@ -8,6 +8,7 @@ from django.test import Client, TestCase
 from django.urls import reverse
 from django import forms
 
+from posts import rendering
 from posts.models import Post, User, Group, Follow
 
 
@@ -45,6 +46,7 @@ class PostPagesTests(TestCase):
         super().tearDownClass()
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.user = User.objects.create(username="vlados")
         self.authorized_client = Client()
@@ -154,18 +156,52 @@ class PostPagesTests(TestCase):
     def test_index_page_cache(self):
         """Проверяем работу кэширования главной страницы"""
         response = self.authorized_client.get(reverse("index"))
-        content_before_add_post = response.content
-        Post.objects.create(text="текст ещё одного поста",
-                            author=PostPagesTests.user)
-        response_after_add_post = self.authorized_client.get(reverse("index"))
-        content_after_add_post = response_after_add_post.content
-        self.assertEqual(content_before_add_post, content_after_add_post)
+        content_before_update = response.content
+        text = "текст, изменённый в обход сигналов"
+        text_html, excerpt_html = rendering.render_post(text)
+        Post.objects.filter(pk=PostPagesTests.post.pk).update(
+            text=text, text_html=text_html, excerpt_html=excerpt_html
+        )
+        response_after_update = self.authorized_client.get(reverse("index"))
+        content_after_update = response_after_update.content
+        self.assertEqual(content_before_update, content_after_update)
         cache.clear()
         response_after_clear_cache = self.authorized_client.get(
             reverse("index")
         )
         content_after_clear_cache = response_after_clear_cache.content
-        self.assertNotEqual(content_before_add_post, content_after_clear_cache)
+        self.assertNotEqual(content_before_update, content_after_clear_cache)
+
+    def test_index_page_cache_invalidated_by_new_post(self):
+        """Проверяем, что новый пост сразу сбрасывает кэш главной страницы"""
+        response = self.authorized_client.get(reverse("index"))
+        content_before_add_post = response.content
+        Post.objects.create(text="текст ещё одного поста",
+                            author=PostPagesTests.user)
+        response_after_add_post = self.authorized_client.get(reverse("index"))
+        content_after_add_post = response_after_add_post.content
+        self.assertNotEqual(content_before_add_post, content_after_add_post)
+        self.assertIn("текст ещё одного поста",
+                      content_after_add_post.decode())
+
+    def test_group_and_profile_cache_invalidated_by_group_change(self):
+        """Проверяем, что смена группы поста сбрасывает кэш группы
+        и профиля"""
+        other_group = Group.objects.create(title="Другая группа",
+                                           slug="other-slug")
+        group_url = reverse("group_posts",
+                            kwargs={"slug": PostPagesTests.group.slug})
+        profile_url = reverse("profile",
+                              kwargs={"username": PostPagesTests.user})
+        self.guest_client.get(group_url)
+        self.guest_client.get(profile_url)
+        post = Post.objects.get(pk=PostPagesTests.post.pk)
+        post.group = other_group
+        post.save()
+        self.assertNotIn(PostPagesTests.post.text,
+                         self.guest_client.get(group_url).content.decode())
+        self.assertIn("Другая группа",
+                      self.guest_client.get(profile_url).content.decode())
 
     def test_follow_authorized_user(self):
         """Проверяем, что авторизованный клиент может подписаться"""
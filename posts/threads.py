@@ -0,0 +1,39 @@
+from django.db.models import CharField, Value
+from django.db.models.functions import Cast, LPad
+
+from .models import Comment
+from .paginator import THREAD_ORDERING
+
+# Символ сразу за цифрами: все пути поддерева лежат в [path, path + END).
+END = ":"
+
+
+def thread(post_id, root=None, depth=None):
+    """Комментарии поста в порядке показа одним запросом по индексу
+    (post, path).
+
+    С ``root`` — только его поддерево, с ``depth`` — не глубже
+    ``depth`` уровней от корня ветки (или от верхнего уровня поста).
+    """
+    comments = Comment.objects.filter(post_id=post_id)
+    base = 0
+    if root is not None:
+        comments = comments.filter(path__gte=root.path,
+                                   path__lt=root.path + END)
+        base = root.depth
+    if depth is not None:
+        comments = comments.filter(depth__lte=base + depth)
+    return comments.order_by(*THREAD_ORDERING)
+
+
+def fill_root_paths(queryset=None):
+    """Пути для комментариев, вставленных в обход save().
+
+    Массовая вставка (генератор, импорт записей без id) оставляет путь
+    пустым только у комментариев верхнего уровня, их путь — собственный
+    id.
+    """
+    queryset = Comment.objects.all() if queryset is None else queryset
+    return queryset.filter(path="").update(path=LPad(
+        Cast("id", CharField()), Comment.PATH_SEGMENT, Value("0")
+    ))
@@ -0,0 +1,44 @@
+import json
+import logging
+
+from django.conf import settings
+from django.utils import timezone
+from sorl.thumbnail import get_thumbnail
+
+from yatube import timing
+
+from . import caching
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+
+def build_manifest(image):
+    manifest = {"source": image.name}
+    variants = settings.THUMBNAIL_VARIANTS.items()
+    with timing.span("thumb"):
+        for variant, (geometry, options) in variants:
+            manifest[variant] = get_thumbnail(image, geometry, **options).url
+    return manifest
+
+
+def generate(post_id):
+    post = Post.objects.filter(pk=post_id).only(
+        "id", "image", "author_id", "group_id"
+    ).first()
+    if post is None:
+        return
+    if not post.image:
+        Post.objects.filter(pk=post_id).update(thumbnails="")
+        return
+    try:
+        manifest = build_manifest(post.image)
+    except Exception:
+        logger.exception("Не удалось подготовить миниатюры поста %s",
+                         post_id)
+        return
+    updated = Post.objects.filter(pk=post_id, image=post.image.name).update(
+        thumbnails=json.dumps(manifest), updated_at=timezone.now()
+    )
+    if updated:
+        caching.bump(*caching.post_scopes(post.author_id, post.group_id))
@@ -0,0 +1,150 @@
+from django.conf import settings
+
+from .models import Follow, Post, TimelineEntry, UserStats
+from .paginator import MergedFeed, paginate
+
+
+def is_celebrity(author_id):
+    """Автор, у которого подписчиков больше TIMELINE_FANOUT_LIMIT.
+
+    Его записи не раскладываются по лентам подписчиков, а подмешиваются
+    в ленту при чтении.
+    """
+    return UserStats.objects.filter(
+        user_id=author_id,
+        followers_count__gt=settings.TIMELINE_FANOUT_LIMIT
+    ).exists()
+
+
+def defer_fan_out(author_id):
+    """Раскладку по большому числу лент выполняет воркер очереди."""
+    return UserStats.objects.filter(
+        user_id=author_id,
+        followers_count__gt=settings.TIMELINE_INLINE_FANOUT
+    ).exists()
+
+
+def _bulk_insert(entries):
+    TimelineEntry.objects.bulk_create(
+        entries, batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+def fan_out(post):
+    if is_celebrity(post.author_id):
+        return
+    follower_ids = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list("user_id", flat=True)
+    _bulk_insert(
+        TimelineEntry(user_id=user_id, post_id=post.id,
+                      author_id=post.author_id, pub_date=post.pub_date)
+        for user_id in follower_ids.iterator()
+    )
+
+
+def _recent_posts(author_id):
+    return Post.objects.filter(author_id=author_id).order_by(
+        "-pub_date", "-id"
+    ).values_list("id", "pub_date")[:settings.TIMELINE_BACKFILL_LIMIT]
+
+
+def backfill(user_id, author_id):
+    if is_celebrity(author_id):
+        return
+    _bulk_insert(
+        TimelineEntry(user_id=user_id, post_id=post_id, author_id=author_id,
+                      pub_date=pub_date)
+        for post_id, pub_date in _recent_posts(author_id)
+    )
+
+
+def left_celebrities(author_id):
+    """Автор только что опустился до TIMELINE_FANOUT_LIMIT подписчиков.
+
+    Пока он был знаменитостью, его записи подмешивались при чтении и в
+    ленты не попадали; теперь их нужно разложить, см. restore().
+    """
+    return UserStats.objects.filter(
+        user_id=author_id,
+        followers_count=settings.TIMELINE_FANOUT_LIMIT
+    ).exists()
+
+
+def restore(author_id):
+    """Раскладывает свежие записи автора по лентам всех подписчиков."""
+    if is_celebrity(author_id):
+        return
+    posts = list(_recent_posts(author_id))
+    follower_ids = Follow.objects.filter(
+        author_id=author_id
+    ).values_list("user_id", flat=True)
+    _bulk_insert(
+        TimelineEntry(user_id=user_id, post_id=post_id, author_id=author_id,
+                      pub_date=pub_date)
+        for user_id in follower_ids.iterator()
+        for post_id, pub_date in posts
+    )
+
+
+def prune(user_id, author_id):
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def followed_celebrities(user):
+    return Follow.objects.filter(
+        user=user,
+        author__stats__followers_count__gt=settings.TIMELINE_FANOUT_LIMIT
+    ).order_by("author_id").values_list("author_id",
+                                        "author__stats__posts_count")
+
+
+def _entries(user, related, deferred):
+    return TimelineEntry.objects.filter(user=user).select_related(
+        "post", *(f"post__{name}" for name in related)
+    ).defer(*(f"post__{name}" for name in deferred))
+
+
+def feed(user, celebrities, related=(), deferred=()):
+    """Лента подписок, слитая из TimelineEntry и записей знаменитостей.
+
+    Каждая знаменитость — отдельный источник, читаемый по индексу
+    (author, -pub_date, -id); записи ленты читаются по индексу
+    (user, -pub_date, -id). Ранг источника знаменитости — id автора.
+    ``celebrities`` — пары (id автора, число его записей), как их
+    возвращает followed_celebrities().
+    ``related`` и ``deferred`` — связи и поля поста для
+    select_related() и defer().
+    """
+    counts = dict(celebrities)
+    entries = _entries(user, related, deferred).exclude(
+        author_id__in=list(counts)
+    )
+    posts = Post.objects.select_related(*related).defer(*deferred)
+    return MergedFeed([(0, entries)] + [
+        (author_id, posts.filter(author_id=author_id))
+        for author_id in counts
+    ], counts)
+
+
+def feed_page(request, user, related=(), per_page=None, keyset=False,
+              deferred=()):
+    """Страница ленты подписок.
+
+    Если среди подписок нет знаменитостей, лента целиком лежит в
+    TimelineEntry и читается по индексу (user, -pub_date, -id) без
+    сортировки. Иначе страница сливается из нескольких источников,
+    см. feed(). В обоих случаях строки TimelineEntry затем
+    подменяются на сами посты.
+    """
+    celebrities = list(followed_celebrities(user))
+    if celebrities:
+        entries = feed(user, celebrities, related, deferred)
+    else:
+        entries = _entries(user, related, deferred)
+    page = paginate(request, entries, per_page, keyset=keyset)
+    page.object_list = [
+        row.post if isinstance(row, TimelineEntry) else row for row in page
+    ]
+    return page
@@ -8,12 +8,18 @@ urlpatterns = [
     path("group/<slug:slug>/", views.group_posts, name="group_posts"),
     path("new/", views.new_post, name="new_post"),
     path("group-new/", views.new_group, name="new_group"),
+    path("search/", views.search_posts, name="search"),
+    path("search/json/", views.search_posts_json, name="search_json"),
     path("<str:username>/", views.profile, name="profile"),
     path("<str:username>/follow/", views.profile_follow,
          name="profile_follow"),
     path("<str:username>/unfollow/", views.profile_unfollow,
          name="profile_unfollow"),
+    path("<str:username>/export/", views.profile_export,
+         name="profile_export"),
     path("<str:username>/<int:post_id>/", views.post_view, name="post"),
+    path("<str:username>/<int:post_id>/comments/", views.post_comments,
+         name="post_comments"),
     path("<str:username>/<int:post_id>/edit/", views.post_edit,
          name="post_edit"),
     path("<str:username>/<int:post_id>/delete/", views.post_delete,
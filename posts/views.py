@@ -1,28 +1,82 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.shortcuts import get_object_or_404, render, redirect
-from django.core.paginator import Paginator
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, render, redirect, reverse
+from django.utils.http import urlencode
 
+from yatube.queries import query_budget
+
+from . import caching, counters, exporter, search, threads, timeline
+from .conditional import (group_condition, index_condition, post_condition,
+                          profile_condition)
 from .forms import PostForm, CommentForm, GroupForm
 from .models import Group, Post, User, Follow
+from .paginator import THREAD_ORDERING, CursorPaginator, paginate
+from .search import SearchPaginator
 
 
+@query_budget(5)
+@index_condition
 def index(request):
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
-    return render(request, "posts/index.html", {"page": page})
+    post_list = Post.objects.select_related("author", "group").defer(
+        *Post.CARD_DEFERRED)
+    page = paginate(request, post_list)
+    context = {"page": page, **caching.feed_context(caching.INDEX)}
+    return render(request, "posts/index.html", context)
 
 
+@query_budget(7)
+@group_condition
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    group_posts_list = group.posts.all()
-    paginator = Paginator(group_posts_list, 10)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
-    return render(request, "posts/group.html", {"group": group, "page": page})
+    group_posts_list = group.posts.select_related(
+        "author", "group").defer(*Post.CARD_DEFERRED)
+    page = paginate(request, group_posts_list)
+    context = {
+        "group": group,
+        "page": page,
+        **caching.feed_context(caching.group_scope(group.id)),
+    }
+    return render(request, "posts/group.html", context)
+
+
+def _search_page(request):
+    query = request.GET.get("q", "").strip()
+    if not search.available():
+        posts = (Post.objects.filter(text__icontains=query) if query
+                 else Post.objects.none())
+        return query, paginate(request, posts)
+    page = SearchPaginator(query).get_page(request.GET.get("cursor"))
+    return query, page
+
 
+@query_budget(5)
+def search_posts(request):
+    query, page = _search_page(request)
+    page.link_params = urlencode({"q": query}) + "&"
+    return render(request, "posts/search.html", {"query": query,
+                                                 "page": page})
 
+
+@query_budget(3)
+def search_posts_json(request):
+    query, page = _search_page(request)
+    results = [{
+        "id": post.id,
+        "text": post.text,
+        "author": post.author.username,
+        "group": post.group.slug if post.group else None,
+        "pub_date": post.pub_date.isoformat(),
+        "url": reverse("post", args=[post.author.username, post.id]),
+    } for post in page]
+    return JsonResponse({
+        "query": query,
+        "results": results,
+        "next": getattr(page, "next_cursor", None),
+    }, json_dumps_params={"ensure_ascii": False})
+
+
+@query_budget(12)
 @login_required
 def new_post(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
@@ -35,46 +89,125 @@ def new_post(request):
     return redirect("index")
 
 
+@query_budget(3)
 @login_required
 def new_group(request):
     form = GroupForm(request.POST or None, files=request.FILES or None)
     if not form.is_valid():
         return render(request, "posts/group_new.html", {"form": form,
-                                                  "is_new": True})
+                                                        "is_new": True})
     group = form.save(commit=False)
     group.save()
     return redirect("index")
 
 
+@query_budget(7)
+@profile_condition
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    user_posts_list = author.posts.all()
-    paginator = Paginator(user_posts_list, 10)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
+    author = get_object_or_404(User.objects.select_related("stats"),
+                               username=username)
+    user_posts_list = author.posts.select_related("group").defer(
+        *Post.CARD_DEFERRED)
+    page = paginate(request, user_posts_list,
+                    count=counters.user_stats(author).posts_count)
     following = (request.user.is_authenticated and Follow.objects.filter(
         user=request.user, author__username=username).exists())
     context = {
         "author": author,
         "page": page,
-        "following": following
+        "following": following,
+        **caching.feed_context(caching.author_scope(author.id),
+                               caching.GROUPS),
     }
     return render(request, "posts/profile.html", context)
 
 
+@query_budget(5)
+@login_required
+def profile_export(request, username):
+    if request.user.username != username:
+        return redirect("profile", username)
+    fmt = request.GET.get("format", "ndjson")
+    if fmt not in exporter.FORMATS:
+        fmt = "ndjson"
+    kind = request.GET.get("type")
+    if kind not in exporter.FIELDS:
+        kind = None
+    response = StreamingHttpResponse(
+        exporter.stream(request.user, fmt, kind=kind),
+        content_type=exporter.FORMATS[fmt]
+    )
+    name = f"{username}-{kind}" if kind else username
+    response["Content-Disposition"] = (
+        f'attachment; filename="{name}.{fmt}"'
+    )
+    return response
+
+
+@query_budget(8)
+@post_condition
 def post_view(request, username, post_id):
-    post = get_object_or_404(Post, id=post_id, author__username=username)
+    post = get_object_or_404(Post.objects.select_related("author__stats"),
+                             id=post_id, author__username=username)
+    counters.user_stats(post.author)
     form = CommentForm(request.POST or None)
-    comments = post.comments.all()
+    comments = _comments_page(request, post)
     context = {
         "post": post,
         "author": post.author,
         "comments": comments,
+        "comment_list": comments.paginator.object_list,
+        "reply_to": _post_comment(post, request.GET.get("reply")),
         "form": form
     }
     return render(request, "posts/post.html", context)
 
 
+def _post_comment(post, comment_id):
+    """Комментарий поста по id из запроса; чужой или кривой id — None."""
+    if not (comment_id or "").isdigit():
+        return None
+    return post.comments.select_related("author").filter(
+        pk=comment_id).first()
+
+
+def _comments_page(request, post, root=None, depth=None):
+    """Страница ветки комментариев вместе с авторами, по курсору."""
+    paginator = CursorPaginator(
+        threads.thread(post.id, root, depth).select_related("author"),
+        settings.COMMENTS_PER_PAGE, THREAD_ORDERING
+    )
+    page = paginator.get_page(request.GET.get("cursor"))
+    params = {"root": root and root.id, "depth": depth}
+    page.link_params = urlencode(
+        {name: value for name, value in params.items() if value is not None}
+    )
+    if page.link_params:
+        page.link_params += "&"
+    return page
+
+
+@query_budget(6)
+@post_condition
+def post_comments(request, username, post_id):
+    """Фрагмент со следующей страницей комментариев для подгрузки.
+
+    ``?root=`` ограничивает фрагмент веткой одного комментария,
+    ``?depth=`` — числом уровней ответов под ним.
+    """
+    post = get_object_or_404(Post.objects.select_related("author"),
+                             id=post_id, author__username=username)
+    root = _post_comment(post, request.GET.get("root"))
+    depth = request.GET.get("depth", "")
+    depth = int(depth) if depth.isdigit() else None
+    return render(request, "includes/comment_list.html", {
+        "post": post,
+        "author": post.author,
+        "comments": _comments_page(request, post, root, depth),
+    })
+
+
+@query_budget(6)
 @login_required
 def post_edit(request, username, post_id):
     post = get_object_or_404(Post, id=post_id, author__username=username)
@@ -89,6 +222,7 @@ def post_edit(request, username, post_id):
     return render(request, "posts/new.html", {"form": form, 'post': post})
 
 
+@query_budget(13)
 @login_required
 def post_delete(request, username, post_id):
     post = get_object_or_404(Post, id=post_id, author__username=username)
@@ -111,6 +245,7 @@ def server_error(request):
     return render(request, "misc/500.html", status=500)
 
 
+@query_budget(8)
 @login_required
 def add_comment(request, username, post_id):
     form = CommentForm(request.POST or None)
@@ -121,23 +256,25 @@ def add_comment(request, username, post_id):
     comment = form.save(commit=False)
     comment.author = request.user
     comment.post = post
+    comment.parent = _post_comment(post, request.POST.get("parent"))
     comment.save()
     return redirect("post", username, post_id)
 
 
+@query_budget(6)
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user).all()
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
+    page = timeline.feed_page(request, request.user,
+                              related=("author", "group"),
+                              deferred=Post.CARD_DEFERRED)
     context = {
         "page": page,
-        "paginator": paginator,
+        "paginator": page.paginator,
     }
     return render(request, "posts/follow.html", context)
 
 
+@query_budget(5)
 @login_required
 def profile_follow(request, username):
     author = User.objects.get(username=username)
@@ -146,6 +283,7 @@ def profile_follow(request, username):
     return redirect("profile", username)
 
 
+@query_budget(11)
 @login_required
 def profile_unfollow(request, username):
     author = User.objects.get(username=username)
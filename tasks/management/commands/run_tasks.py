@@ -0,0 +1,34 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+
+from tasks import queue
+
+
+class Command(BaseCommand):
+    help = "Выполняет отложенные задачи из очереди"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=10)
+        parser.add_argument("--sleep", type=float, default=1.0,
+                            help="Пауза в секундах, когда очередь пуста")
+        parser.add_argument("--once", action="store_true",
+                            help="Выполнить доступные задачи и выйти")
+
+    def handle(self, *args, **options):
+        worker = uuid.uuid4().hex
+        processed = 0
+        try:
+            while True:
+                queue.requeue_stale()
+                done = queue.run_batch(options["batch_size"], worker)
+                processed += done
+                if done:
+                    continue
+                if options["once"]:
+                    break
+                time.sleep(options["sleep"])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(f"Выполнено задач: {processed}")
@@ -0,0 +1,41 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    PENDING = "pending"
+    RUNNING = "running"
+    FAILED = "failed"
+    STATUSES = (
+        (PENDING, "В очереди"),
+        (RUNNING, "Выполняется"),
+        (FAILED, "Ошибка"),
+    )
+
+    name = models.CharField(verbose_name="Задача", max_length=200)
+    payload = models.TextField(verbose_name="Аргументы", default="{}")
+    priority = models.SmallIntegerField(verbose_name="Приоритет", default=0)
+    status = models.CharField(verbose_name="Статус", max_length=10,
+                              choices=STATUSES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(verbose_name="Попыток",
+                                                default=0)
+    max_attempts = models.PositiveSmallIntegerField(
+        verbose_name="Максимум попыток", default=3
+    )
+    run_at = models.DateTimeField(verbose_name="Запустить не раньше",
+                                  default=timezone.now)
+    locked_by = models.CharField(max_length=64, blank=True, default="")
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(verbose_name="Последняя ошибка",
+                                  blank=True, default="")
+    created = models.DateTimeField("date created", auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "-priority", "run_at", "id"],
+                         name="task_queue_idx"),
+            models.Index(fields=["locked_by"], name="task_locked_by_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk}"
@@ -0,0 +1,123 @@
+import json
+import logging
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+REGISTRY = {}
+
+ORDERING = ("-priority", "run_at", "id")
+
+
+class TaskFunction:
+    def __init__(self, func, priority, max_attempts):
+        self.func = func
+        self.name = f"{func.__module__}.{func.__qualname__}"
+        self.priority = priority
+        self.max_attempts = max_attempts
+        REGISTRY[self.name] = self
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def _build(self, args, kwargs):
+        return Task(
+            name=self.name,
+            payload=json.dumps({"args": list(args), "kwargs": kwargs}),
+            priority=self.priority,
+            max_attempts=self.max_attempts,
+        )
+
+    def delay(self, *args, **kwargs):
+        """Ставит вызов в очередь; в режиме TASKS_EAGER выполняет сразу."""
+        if settings.TASKS_EAGER:
+            self.func(*args, **kwargs)
+            return None
+        queued = self._build(args, kwargs)
+        queued.save()
+        return queued
+
+    def delay_many(self, calls):
+        """Ставит в очередь пачку вызовов одним bulk_create.
+
+        ``calls`` — последовательность кортежей позиционных аргументов.
+        """
+        if settings.TASKS_EAGER:
+            for args in calls:
+                self.func(*args)
+            return
+        Task.objects.bulk_create(
+            (self._build(args, {}) for args in calls),
+            batch_size=settings.TASKS_BATCH_SIZE
+        )
+
+
+def task(priority=0, max_attempts=3):
+    def decorator(func):
+        return TaskFunction(func, priority, max_attempts)
+    return decorator
+
+
+def requeue_stale():
+    deadline = timezone.now() - timedelta(seconds=settings.TASKS_LOCK_TIMEOUT)
+    return Task.objects.filter(
+        status=Task.RUNNING, locked_at__lt=deadline
+    ).update(status=Task.PENDING, locked_by="", locked_at=None)
+
+
+def claim(worker, batch_size):
+    now = timezone.now()
+    ids = list(Task.objects.filter(
+        status=Task.PENDING, run_at__lte=now
+    ).order_by(*ORDERING).values_list("id", flat=True)[:batch_size])
+    if not ids:
+        return []
+    Task.objects.filter(pk__in=ids, status=Task.PENDING).update(
+        status=Task.RUNNING, locked_by=worker, locked_at=now
+    )
+    return list(Task.objects.filter(
+        locked_by=worker, status=Task.RUNNING
+    ).order_by(*ORDERING))
+
+
+def execute(task):
+    try:
+        function = REGISTRY.get(task.name)
+        if function is None:
+            raise LookupError(f"Неизвестная задача {task.name}")
+        payload = json.loads(task.payload)
+        function.func(*payload["args"], **payload["kwargs"])
+    except Exception:
+        logger.exception("Задача %s завершилась ошибкой", task)
+        task.attempts += 1
+        task.last_error = traceback.format_exc()
+        task.locked_by = ""
+        task.locked_at = None
+        if task.attempts >= task.max_attempts:
+            task.status = Task.FAILED
+        else:
+            task.status = Task.PENDING
+            task.run_at = timezone.now() + timedelta(
+                seconds=settings.TASKS_RETRY_DELAY * 2 ** (task.attempts - 1)
+            )
+        task.save(update_fields=["attempts", "last_error", "locked_by",
+                                 "locked_at", "status", "run_at"])
+        return False
+    task.delete()
+    return True
+
+
+def run_batch(batch_size, worker=None):
+    """Забирает и выполняет до ``batch_size`` задач, возвращает их число."""
+    worker = worker or uuid.uuid4().hex
+    claimed = claim(worker, batch_size)
+    for claimed_task in claimed:
+        execute(claimed_task)
+    return len(claimed)
@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from tasks import queue
+from tasks.models import Task
+
+CALLS = []
+
+
+@queue.task(priority=1)
+def remember(value):
+    CALLS.append(value)
+
+
+@queue.task(priority=5)
+def remember_urgent(value):
+    CALLS.append(value)
+
+
+@queue.task(max_attempts=2)
+def explode():
+    raise RuntimeError("boom")
+
+
+@override_settings(TASKS_EAGER=False, TASKS_RETRY_DELAY=0)
+class TaskQueueTest(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_delay_enqueues_and_worker_runs(self):
+        """Проверяем, что отложенная задача выполняется воркером"""
+        remember.delay("раз")
+        self.assertEqual(CALLS, [])
+        self.assertEqual(queue.run_batch(10), 1)
+        self.assertEqual(CALLS, ["раз"])
+        self.assertFalse(Task.objects.exists())
+
+    def test_priority_order(self):
+        """Проверяем, что задачи с большим приоритетом идут первыми"""
+        remember.delay("обычная")
+        remember_urgent.delay("срочная")
+        queue.run_batch(10)
+        self.assertEqual(CALLS, ["срочная", "обычная"])
+
+    def test_batching(self):
+        """Проверяем пакетную постановку и выборку задач"""
+        remember.delay_many([(number,) for number in range(5)])
+        self.assertEqual(queue.run_batch(2), 2)
+        self.assertEqual(queue.run_batch(10), 3)
+        self.assertEqual(sorted(CALLS), list(range(5)))
+
+    def test_retries_then_fails(self):
+        """Проверяем повторы и пометку задачи как упавшей"""
+        explode.delay()
+        queue.run_batch(10)
+        failed = Task.objects.get()
+        self.assertEqual(failed.status, Task.PENDING)
+        self.assertEqual(failed.attempts, 1)
+        queue.run_batch(10)
+        failed.refresh_from_db()
+        self.assertEqual(failed.status, Task.FAILED)
+        self.assertIn("boom", failed.last_error)
+
+    def test_stale_tasks_requeued(self):
+        """Проверяем, что задачи упавшего воркера возвращаются в очередь"""
+        remember.delay("потерянная")
+        Task.objects.update(status=Task.RUNNING, locked_by="dead",
+                            locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(queue.requeue_stale(), 1)
+        queue.run_batch(10)
+        self.assertEqual(CALLS, ["потерянная"])
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_mode(self):
+        """Проверяем, что в режиме eager задача выполняется сразу"""
+        remember.delay("сразу")
+        self.assertEqual(CALLS, ["сразу"])
+        self.assertFalse(Task.objects.exists())
@@ -0,0 +1,270 @@
+import atexit
+import fcntl
+import hmac
+import json
+import os
+import secrets
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5,
+                    10)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+HISTOGRAMS = {
+    "yatube_request_duration_seconds": (
+        "Время ответа по имени адреса", DURATION_BUCKETS),
+    "yatube_db_queries": (
+        "SQL-запросов на один ответ", QUERY_BUCKETS),
+}
+COUNTERS = {
+    "yatube_requests_total": "Ответы по имени адреса и статусу",
+    "yatube_db_seconds_total": "Суммарное время SQL",
+    "yatube_cache_hits_total": "Попадания в кэш в запросах из выборки",
+    "yatube_cache_misses_total": "Промахи кэша в запросах из выборки",
+}
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+RETIRED = "retired.json"
+
+
+def _read(path):
+    with open(path) as source:
+        return json.load(source)
+
+
+def _write(path, rows):
+    """Атомарно заменяет ``path``.
+
+    У каждого писателя свой временный файл: общий ``path.tmp`` один
+    поток переименовывал, пока другой ещё в него писал.
+    """
+    descriptor, temporary = tempfile.mkstemp(
+        dir=os.path.dirname(path), suffix=".tmp"
+    )
+    try:
+        with os.fdopen(descriptor, "w") as target:
+            json.dump(rows, target)
+        os.replace(temporary, path)
+    except BaseException:
+        os.remove(temporary)
+        raise
+
+
+def _alive(name):
+    """Жив ли процесс, записавший файл ``<pid>-<метка>.json``."""
+    try:
+        pid = int(name[:-len(".json")].split("-")[0])
+    except ValueError:
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Registry:
+    """Счётчики одного процесса.
+
+    С METRICS_DIR процесс раз в METRICS_FLUSH_SECONDS и при выходе
+    записывает свои значения в файл ``<pid>-<метка>.json``, а /metrics/
+    складывает файлы всех воркеров хоста. Случайная метка не даёт
+    новому процессу с тем же pid перезаписать файл завершившегося.
+    Файлы завершившихся процессов при сборе переносятся в retired.json,
+    так что их накопленные значения по-прежнему учитываются.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # Снимок и запись файла под одной блокировкой: иначе более
+        # старый снимок мог бы заменить более новый.
+        self.flush_lock = threading.Lock()
+        self.values = defaultdict(float)
+        self.flushed_at = 0.0
+        self.owner = None
+
+    def filename(self):
+        # После fork() потомок получает свою метку и свой файл.
+        if self.owner is None or self.owner[0] != os.getpid():
+            self.owner = (os.getpid(), secrets.token_hex(4))
+        return "{}-{}.json".format(*self.owner)
+
+    def inc(self, name, labels, amount=1):
+        self.values[name, tuple(sorted(labels.items()))] += amount
+
+    def histogram(self, name, labels, value):
+        buckets = HISTOGRAMS[name][1]
+        bound = next((str(bucket) for bucket in buckets if value <= bucket),
+                     "+Inf")
+        self.inc(f"{name}_bucket", {**labels, "le": bound})
+        self.inc(f"{name}_sum", labels, value)
+        self.inc(f"{name}_count", labels)
+
+    def observe(self, record):
+        """Учитывает строку замеров из yatube.timing."""
+        labels = {"view": record["view"] or "unmatched"}
+        with self.lock:
+            self.inc("yatube_requests_total",
+                     {**labels, "status": str(record["status"])})
+            self.histogram("yatube_request_duration_seconds", labels,
+                           record["total_ms"] / 1000)
+            self.histogram("yatube_db_queries", labels,
+                           record["db_queries"])
+            self.inc("yatube_db_seconds_total", labels,
+                     record["db_ms"] / 1000)
+            if record["sampled"]:
+                self.inc("yatube_cache_hits_total", labels,
+                         record["cache_hits"])
+                self.inc("yatube_cache_misses_total", labels,
+                         record["cache_misses"])
+        if (time.monotonic() - self.flushed_at
+                > settings.METRICS_FLUSH_SECONDS):
+            self.flush()
+
+    def flush(self):
+        directory = settings.METRICS_DIR
+        if not directory:
+            return
+        with self.flush_lock:
+            with self.lock:
+                self.flushed_at = time.monotonic()
+                rows = [[name, list(labels), value]
+                        for (name, labels), value in self.values.items()]
+            os.makedirs(directory, exist_ok=True)
+            _write(os.path.join(directory, self.filename()), rows)
+
+    @staticmethod
+    def retire(directory):
+        """Переносит значения завершившихся процессов в retired.json.
+
+        Блокировка не даёт двум одновременным сборам учесть один файл
+        дважды. Файл процесса удаляется только после записи
+        retired.json: сбой между шагами может завысить счётчики, но не
+        уменьшить их.
+        """
+        with open(os.path.join(directory, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            dead = [entry.path for entry in os.scandir(directory)
+                    if entry.name.endswith(".json")
+                    and entry.name != RETIRED and not _alive(entry.name)]
+            if not dead:
+                return
+            retired = os.path.join(directory, RETIRED)
+            sources = dead + ([retired] if os.path.exists(retired) else [])
+            merged = defaultdict(float)
+            for path in sources:
+                for name, labels, value in _read(path):
+                    merged[name, tuple(map(tuple, labels))] += value
+            _write(retired, [[name, list(labels), value]
+                             for (name, labels), value in merged.items()])
+            for path in dead:
+                os.remove(path)
+
+    def collect(self):
+        """Сумма значений всех процессов хоста."""
+        directory = settings.METRICS_DIR
+        if not directory:
+            with self.lock:
+                return dict(self.values)
+        self.flush()
+        self.retire(directory)
+        merged = defaultdict(float)
+        for entry in os.scandir(directory):
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                rows = _read(entry.path)
+            except FileNotFoundError:
+                # Соседний сбор уже перенёс файл в retired.json.
+                continue
+            for name, labels, value in rows:
+                merged[name, tuple(map(tuple, labels))] += value
+        return merged
+
+
+registry = Registry()
+atexit.register(registry.flush)
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+
+def _number(value):
+    return str(int(value)) if value == int(value) else repr(value)
+
+
+def _buckets(values, name):
+    """Счётчики корзин гистограммы по наборам меток без ``le``."""
+    counts = defaultdict(dict)
+    for (metric, labels), value in values.items():
+        if metric == f"{name}_bucket":
+            pairs = dict(labels)
+            bound = pairs.pop("le")
+            counts[tuple(pairs.items())][bound] = value
+    return sorted(counts.items())
+
+
+def _histogram(values, name, buckets):
+    lines = []
+    for pairs, by_bound in _buckets(values, name):
+        total = 0
+        for bound in [str(bucket) for bucket in buckets] + ["+Inf"]:
+            total += by_bound.get(bound, 0)
+            lines.append(f"{name}_bucket"
+                         f"{_labels(pairs + (('le', bound),))} "
+                         f"{_number(total)}")
+        for suffix in ("sum", "count"):
+            value = values.get((f"{name}_{suffix}", pairs), 0)
+            lines.append(f"{name}_{suffix}{_labels(pairs)} "
+                         f"{_number(value)}")
+    return lines
+
+
+def render(values):
+    """Текст в формате экспозиции Prometheus."""
+    lines = []
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        lines += _histogram(values, name, buckets)
+    for name, help_text in COUNTERS.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        lines += [f"{name}{_labels(labels)} {_number(value)}"
+                  for (metric, labels), value in sorted(values.items())
+                  if metric == name]
+    name = "yatube_cache_hit_ratio"
+    lines += [f"# HELP {name} Доля попаданий в кэш",
+              f"# TYPE {name} gauge"]
+    for (metric, labels), hits in sorted(values.items()):
+        if metric != "yatube_cache_hits_total":
+            continue
+        misses = values.get(("yatube_cache_misses_total", labels), 0)
+        if hits + misses:
+            lines.append(f"{name}{_labels(labels)} "
+                         f"{_number(hits / (hits + misses))}")
+    return "\n".join(lines) + "\n"
+
+
+def allowed(request):
+    """Запрос с токеном METRICS_TOKEN или с адреса METRICS_ALLOWED_IPS."""
+    token = settings.METRICS_TOKEN
+    header = request.META.get("HTTP_AUTHORIZATION", "")
+    if token and hmac.compare_digest(header, f"Bearer {token}"):
+        return True
+    return request.META.get("REMOTE_ADDR") in settings.METRICS_ALLOWED_IPS
+
+
+def metrics(request):
+    """Точка сбора метрик, см. METRICS_TOKEN в настройках."""
+    if not allowed(request):
+        raise Http404
+    return HttpResponse(render(registry.collect()), content_type=CONTENT_TYPE)
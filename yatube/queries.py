@@ -0,0 +1,112 @@
+import logging
+import os
+import re
+import sys
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.base import Node
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDERS = re.compile(r"\(%s(?:, %s)*\)")
+
+
+def query_budget(queries):
+    """Объявляет, сколько SQL-запросов может сделать представление.
+
+    Бюджет проверяется тестами (posts/tests/test_query_budgets.py) и,
+    при QUERY_INSPECTOR, в разработке.
+    """
+    def decorator(view):
+        view.query_budget = queries
+        return view
+    return decorator
+
+
+def _location():
+    """Строка шаблона, из которой пришёл запрос, иначе строка кода проекта.
+
+    Узлы шаблонов хранят свой токен с номером строки, поэтому ближайший
+    по стеку узел указывает на ``{{ post.author.username }}`` и т. п.
+    """
+    frame = sys._getframe(2)
+    code_line = None
+    while frame is not None:
+        node = frame.f_locals.get("self")
+        # type(), а не isinstance(): ленивый request.user в локальных
+        # переменных иначе вычислился бы прямо из обёртки запросов.
+        if issubclass(type(node), Node) and getattr(node, "token", None):
+            return f"{node.origin.template_name}:{node.token.lineno}"
+        filename = frame.f_code.co_filename
+        if (code_line is None and filename.startswith(settings.BASE_DIR)
+                and filename != __file__):
+            path = os.path.relpath(filename, settings.BASE_DIR)
+            code_line = f"{path}:{frame.f_lineno}"
+        frame = frame.f_back
+    return code_line
+
+
+class Detector:
+    """Считает запросы и группирует их по форме SQL и месту вызова.
+
+    Форма — текст запроса с параметрами, где списки ``IN (%s, %s)``
+    любой длины сведены к одному виду.
+    """
+
+    def __init__(self):
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        shape = PLACEHOLDERS.sub("(%s...)", sql)
+        self.shapes[shape, _location()] += 1
+        return execute(sql, params, many, context)
+
+    @property
+    def count(self):
+        return sum(self.shapes.values())
+
+    def repeated(self, threshold=None):
+        """Запросы одной формы из одного места — вероятный N+1."""
+        threshold = threshold or settings.QUERY_REPEAT_THRESHOLD
+        return [(location, shape, count)
+                for (shape, location), count in self.shapes.most_common()
+                if count >= threshold]
+
+    def report(self):
+        return "\n".join(f"{count}× {location}: {shape}"
+                         for location, shape, count in self.repeated())
+
+
+@contextmanager
+def detect():
+    detector = Detector()
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(detector))
+        yield detector
+
+
+class QueryInspectorMiddleware:
+    """В разработке предупреждает о N+1 и превышении бюджета запросов."""
+
+    def __init__(self, get_response):
+        if not settings.QUERY_INSPECTOR:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with detect() as detector:
+            response = self.get_response(request)
+        for location, shape, count in detector.repeated():
+            logger.warning("%s: %s одинаковых запросов из %s: %s",
+                           request.path, count, location, shape)
+        match = request.resolver_match
+        budget = getattr(match.func, "query_budget", None) if match else None
+        if budget is not None and detector.count > budget:
+            logger.warning("%s: %s запросов при бюджете %s",
+                           match.view_name, detector.count, budget)
+        return response
@@ -0,0 +1,119 @@
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA = "replica"
+PIN_COOKIE = "pin_primary"
+SYNCED_KEY = "replica-synced-at"
+# Отметку пишет процесс sync_replica, а читают веб-процессы.
+SYNC_CACHE = "shared"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_state = threading.local()
+
+
+def replica_configured():
+    """Реплика задана и это отдельная база.
+
+    В тестах реплика — зеркало основной базы с тем же именем; её
+    отдельное соединение не видит данных из транзакции теста, поэтому
+    такие чтения остаются на основном соединении.
+    """
+    if REPLICA not in connections.databases:
+        return False
+    return (connections[REPLICA].settings_dict["NAME"]
+            != connections[DEFAULT_DB_ALIAS].settings_dict["NAME"])
+
+
+def pin_to_primary():
+    _state.use_replica = False
+
+
+def use_replica():
+    return getattr(_state, "use_replica", False)
+
+
+def require_fresh(moment):
+    """Читает с основной базы, если реплика старше ``moment``.
+
+    Иначе отстающая реплика отрисовала бы страницу, и она попала бы в
+    кэш фрагментов уже под новой версией ленты.
+    """
+    if not use_replica():
+        return
+    if caches[SYNC_CACHE].get(SYNCED_KEY, 0) < moment.timestamp():
+        pin_to_primary()
+
+
+class ReplicaRouter:
+    """Чтения запросов идут на реплику, записи — на основную базу.
+
+    Запрос, который уже что-то записал, и все запросы этого клиента в
+    течение REPLICA_PIN_SECONDS после записи читают с основной базы,
+    поэтому автор сразу видит свой пост, комментарий или подписку.
+    Вне запросов (команды, воркер очереди) всё читается с основной.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not replica_configured():
+            return None
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        return REPLICA if use_replica() else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        _state.wrote = True
+        pin_to_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db != REPLICA
+
+
+class ReplicaMiddleware:
+    """Закрепляет клиента за основной базой после записи.
+
+    Небезопасные методы читают с основной базы весь запрос. Если запрос
+    что-то записал, клиент получает cookie на REPLICA_PIN_SECONDS, пока
+    реплика догоняет изменения.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _state.use_replica = (request.method in SAFE_METHODS
+                              and PIN_COOKIE not in request.COOKIES)
+        _state.wrote = False
+        try:
+            response = self.get_response(request)
+            if _state.wrote:
+                response.set_cookie(PIN_COOKIE, "1",
+                                    max_age=settings.REPLICA_PIN_SECONDS,
+                                    httponly=True, samesite="Lax")
+            return response
+        finally:
+            _state.use_replica = _state.wrote = False
+
+
+def copy_database(source, target):
+    """Копирует файл SQLite через online backup API.
+
+    Читатели реплики не видят полускопированной базы: на время копии
+    SQLite держит блокировку целевого файла. Время начала копии
+    записывается в общий кэш — реплика содержит все изменения до него.
+    """
+    started = time.time()
+    with closing(sqlite3.connect(source)) as primary, \
+            closing(sqlite3.connect(target)) as replica:
+        primary.backup(replica)
+    caches[SYNC_CACHE].set(SYNCED_KEY, started, None)
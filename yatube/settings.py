@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -18,6 +19,8 @@ INSTALLED_APPS = [
     "about",
     "users",
     "posts",
+    "tasks",
+    "api",
     "django.contrib.admin",
     "django.contrib.auth",
     "django.contrib.contenttypes",
@@ -28,7 +31,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "yatube.timing.ServerTimingMiddleware",
+    "yatube.queries.QueryInspectorMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "yatube.replica.ReplicaMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -66,6 +72,75 @@ DATABASES = {
     }
 }
 
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "busy_timeout": 5000,
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,
+}
+
+# Профиль для боевой SQLite включается переменной окружения
+# YATUBE_DB_PROFILE=production.
+if os.environ.get("YATUBE_DB_PROFILE") == "production":
+    DATABASES["default"].update({
+        "ENGINE": "yatube.sqlite_backend",
+        "CONN_MAX_AGE": 600,
+        "PRAGMAS": SQLITE_PRAGMAS,
+        "IMMEDIATE_TRANSACTIONS": True,
+    })
+
+# Реплика для чтения: путь к копии базы, которую поддерживает
+# manage.py sync_replica. В тестах она совпадает с основной базой.
+if os.environ.get("YATUBE_REPLICA"):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "NAME": os.environ["YATUBE_REPLICA"],
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["yatube.replica.ReplicaRouter"]
+REPLICA_PIN_SECONDS = 10
+
+# Доля запросов, для которых Server-Timing разбирает время по шаблонам,
+# кэшу и участкам кода. Число и время SQL-запросов считаются всегда.
+TIMING_SAMPLE_RATE = 0.05
+
+# Каталог, через который воркеры хоста складывают метрики для
+# /metrics/. Без него каждый процесс отдаёт только свои счётчики.
+METRICS_DIR = os.environ.get("YATUBE_METRICS_DIR")
+METRICS_FLUSH_SECONDS = 1
+# Доступ к /metrics/: заголовок "Authorization: Bearer <METRICS_TOKEN>"
+# или REMOTE_ADDR из METRICS_ALLOWED_IPS (через запятую). За обратным
+# прокси на той же машине REMOTE_ADDR всегда 127.0.0.1, поэтому там
+# нужен токен, а список адресов оставляется пустым.
+METRICS_TOKEN = os.environ.get("YATUBE_METRICS_TOKEN", "")
+METRICS_ALLOWED_IPS = [
+    address for address in
+    os.environ.get("YATUBE_METRICS_ALLOWED_IPS", "").split(",") if address
+]
+INTERNAL_IPS = ["127.0.0.1", "::1"]
+
+# Предупреждения о N+1 и превышении бюджетов запросов в разработке.
+QUERY_INSPECTOR = DEBUG
+QUERY_REPEAT_THRESHOLD = 3
+
+# Журнал замеров: путь к файлу, куда пишутся JSON-строки по запросам.
+if os.environ.get("YATUBE_TIMING_LOG"):
+    LOGGING = {
+        "version": 1,
+        "disable_existing_loggers": False,
+        "handlers": {
+            "timing": {
+                "class": "logging.FileHandler",
+                "filename": os.environ["YATUBE_TIMING_LOG"],
+            },
+        },
+        "loggers": {
+            "yatube.timing": {"handlers": ["timing"], "level": "INFO"},
+        },
+    }
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": ("django.contrib.auth.password_validation."
@@ -108,8 +183,44 @@ LOGIN_REDIRECT_URL = "index"
 EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 
+# Кэш "shared" общий для всех процессов на машине: в нём отметка
+# синхронизации реплики (yatube.replica), которую пишет команда
+# sync_replica. Кэш по умолчанию у каждого процесса свой, и отметка
+# туда бы не дошла. Версии лент лежат в базе (posts.caching).
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get(
+            "YATUBE_SHARED_CACHE",
+            os.path.join(tempfile.gettempdir(), "yatube-shared-cache")
+        ),
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
 }
+
+POSTS_PER_PAGE = 10
+POST_EXCERPT_LENGTH = 280
+COMMENTS_PER_PAGE = 20
+COMMENT_MAX_DEPTH = 8
+PAGINATOR_SHALLOW_PAGES = 10
+API_MAX_LIMIT = 100
+
+TIMELINE_FANOUT_LIMIT = 1000
+TIMELINE_INLINE_FANOUT = 100
+TIMELINE_BACKFILL_LIMIT = 1000
+TIMELINE_BATCH_SIZE = 500
+
+FEED_CACHE_TIMEOUT = 60 * 60 * 6
+
+THUMBNAIL_VARIANTS = {
+    "card": ("960x339", {"crop": "center", "upscale": True}),
+}
+
+TASKS_EAGER = False
+TASKS_BATCH_SIZE = 500
+TASKS_RETRY_DELAY = 10
+TASKS_LOCK_TIMEOUT = 60 * 5
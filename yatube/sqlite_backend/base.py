@@ -0,0 +1,28 @@
+from django.db.backends.sqlite3 import base
+
+
+def configure(connection, pragmas):
+    """Выполняет PRAGMA на свежем соединении с SQLite."""
+    for name, value in pragmas.items():
+        connection.execute(f"PRAGMA {name} = {value}")
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """SQLite с настройками соединения из ключа PRAGMAS в DATABASES.
+
+    ``IMMEDIATE_TRANSACTIONS`` открывает transaction.atomic() через
+    BEGIN IMMEDIATE: запись захватывает блокировку сразу и ждёт её по
+    busy_timeout, а не падает с «database is locked», когда читающая
+    транзакция пытается стать пишущей.
+    """
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        configure(connection, self.settings_dict.get("PRAGMAS", {}))
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        if self.settings_dict.get("IMMEDIATE_TRANSACTIONS"):
+            self.cursor().execute("BEGIN IMMEDIATE")
+        else:
+            super()._start_transaction_under_autocommit()
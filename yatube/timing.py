@@ -0,0 +1,199 @@
+import functools
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.db import connections
+from django.template.base import Template
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+_state = threading.local()
+_MISSING = object()
+
+
+class Timings:
+    """Замеры одного запроса.
+
+    SQL считается всегда: это один вызов perf_counter на запрос к базе.
+    Шаблоны, кэш и именованные участки (span) — только в выборке
+    TIMING_SAMPLE_RATE запросов.
+    """
+
+    def __init__(self, sampled):
+        self.sampled = sampled
+        self.queries = 0
+        self.db = 0.0
+        self.templates = {}
+        self.spans = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.depth = 0
+
+    def execute(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db += time.perf_counter() - started
+
+    def header(self, total):
+        metrics = [f'db;dur={self.db * 1000:.2f};desc="{self.queries} SQL"']
+        if self.sampled:
+            rendering = sum(self.templates.values())
+            metrics.append(f"tpl;dur={rendering * 1000:.2f}")
+            metrics.append(f'cache;desc="hit {self.cache_hits}, '
+                           f'miss {self.cache_misses}"')
+            metrics.extend(f"{name};dur={duration * 1000:.2f}"
+                           for name, duration in self.spans.items())
+        metrics.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(metrics)
+
+    def record(self, request, response, total):
+        match = request.resolver_match
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "view": match.view_name if match else None,
+            "status": response.status_code,
+            "total_ms": round(total * 1000, 2),
+            "db_queries": self.queries,
+            "db_ms": round(self.db * 1000, 2),
+            "sampled": self.sampled,
+        }
+        if self.sampled:
+            record.update({
+                "templates_ms": {name: round(duration * 1000, 2)
+                                 for name, duration in self.templates.items()},
+                "spans_ms": {name: round(duration * 1000, 2)
+                             for name, duration in self.spans.items()},
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses,
+            })
+        return record
+
+
+def _sampled():
+    timings = getattr(_state, "timings", None)
+    return timings if timings is not None and timings.sampled else None
+
+
+@contextmanager
+def span(name):
+    """Добавляет время блока в Server-Timing под именем ``name``."""
+    timings = _sampled()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.spans[name] = (timings.spans.get(name, 0)
+                               + time.perf_counter() - started)
+
+
+def _timed_render(render):
+    @functools.wraps(render)
+    def wrapper(self, context):
+        timings = _sampled()
+        if timings is None:
+            return render(self, context)
+        timings.depth += 1
+        started = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            timings.depth -= 1
+            # Вложенные {% include %} уже входят во время внешнего
+            # шаблона и отдельно не суммируются.
+            if timings.depth == 0:
+                name = self.origin.template_name or "<string>"
+                timings.templates[name] = (timings.templates.get(name, 0)
+                                           + time.perf_counter() - started)
+    wrapper.timed = True
+    return wrapper
+
+
+def _counted_get(get):
+    @functools.wraps(get)
+    def wrapper(self, key, default=None, version=None):
+        timings = _sampled()
+        if timings is None:
+            return get(self, key, default, version)
+        value = get(self, key, _MISSING, version)
+        if value is _MISSING:
+            timings.cache_misses += 1
+            return default
+        timings.cache_hits += 1
+        return value
+    wrapper.timed = True
+    return wrapper
+
+
+def _counted_get_many(get_many):
+    @functools.wraps(get_many)
+    def wrapper(self, keys, version=None):
+        values = get_many(self, keys, version)
+        timings = _sampled()
+        if timings is not None:
+            timings.cache_hits += len(values)
+            timings.cache_misses += len(keys) - len(values)
+        return values
+    wrapper.timed = True
+    return wrapper
+
+
+def instrument():
+    """Оборачивает рендер шаблонов и чтение кэша; повторный вызов ничего
+    не меняет."""
+    if not hasattr(Template.render, "timed"):
+        Template.render = _timed_render(Template.render)
+    for alias in settings.CACHES:
+        backend = type(caches[alias])
+        if not hasattr(backend.get, "timed"):
+            backend.get = _counted_get(backend.get)
+        # Базовый get_many вызывает get, его промахи уже посчитаны.
+        if (backend.get_many is not BaseCache.get_many
+                and not hasattr(backend.get_many, "timed")):
+            backend.get_many = _counted_get_many(backend.get_many)
+
+
+class ServerTimingMiddleware:
+    """Отдаёт замеры запроса в заголовке Server-Timing и в лог.
+
+    Строка лога — JSON в логгере ``yatube.timing`` на уровне INFO; те же
+    значения попадают в метрики /metrics/.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        instrument()
+
+    def __call__(self, request):
+        timings = Timings(random.random() < settings.TIMING_SAMPLE_RATE)
+        _state.timings = timings
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(timings.execute))
+                response = self.get_response(request)
+        finally:
+            _state.timings = None
+        total = time.perf_counter() - started
+        response["Server-Timing"] = timings.header(total)
+        record = timings.record(request, response, total)
+        metrics.registry.observe(record)
+        logger.info(json.dumps(record, ensure_ascii=False))
+        return response
@@ -4,6 +4,7 @@ from django.conf.urls import handler404, handler500
 from django.contrib import admin
 from django.urls import include, path
 import posts.views
+from yatube.metrics import metrics
 
 handler404 = "posts.views.page_not_found"
 handler500 = "posts.views.server_error"
@@ -14,6 +15,8 @@ urlpatterns = [
     path("500/", posts.views.server_error, name="error500"),
     path("auth/", include("users.urls")),
     path("auth/", include("django.contrib.auth.urls")),
+    path("api/v1/", include("api.urls")),
+    path("metrics/", metrics, name="metrics"),
     path("", include("posts.urls")),
     path('about/', include('about.urls', namespace='about')),
 ]